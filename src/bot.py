@@ -4,19 +4,40 @@ from pathlib import Path
 # Add project root to path to resolve import conflicts
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import itertools
 import logging
+import os
+import queue
 import random
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 
 import yaml
 from dotenv import load_dotenv
-
-from src.claude.cli_wrapper import ClaudeCLIError, ClaudeCLIWrapper
+from slack_bolt import App
+
+from src.claude.cli_wrapper import (
+    IDLE_TIMEOUT,
+    MAX_IN_FLIGHT,
+    MAX_SESSIONS,
+    ClaudeCLIError,
+    ClaudeCLIWrapper,
+    ClaudeDispatcher,
+)
 from src.claude.prompt_builder import PromptBuilder
+from src.health import start_health_server
 from src.sessions.manager import SessionManager
 from src.slack.app_manager import SlackAppManager
-from src.slack.messaging import SlackMessaging
+from src.slack.messaging import DelayedReaction, SlackMessaging, StreamingReply
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +47,101 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Seconds suggested to users when the work queue is full
+BUSY_RETRY_SECONDS = 30
+# Requests answered faster than this never get a processing reaction
+REACTION_DELAY = 0.25
+# Minimum seconds between edits of a streaming reply (Slack rate limits)
+STREAM_UPDATE_INTERVAL = 1.0
+# Recently seen (channel, ts) event keys remembered to drop Slack re-deliveries
+SEEN_EVENTS_MAX = 1024
+
+# Parsed configs keyed by resolved path -> (mtime_ns, config)
+_config_cache: dict[str, tuple[int, dict]] = {}
+
+
+def _load_config(config_path: str) -> dict:
+    """Load a YAML config file, reusing the parsed result while it is unchanged.
+
+    Args:
+        config_path: Path to bot_config.yaml
+
+    Returns:
+        Parsed configuration dict
+    """
+    path = Path(config_path).resolve()
+    mtime = path.stat().st_mtime_ns
+    cached = _config_cache.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with path.open() as f:
+        config = yaml.load(f, Loader=SafeLoader)
+    _config_cache[str(path)] = (mtime, config)
+    return config
+
+
+@dataclass(slots=True)
+class BotRuntime:
+    """Per-bot settings and collaborators resolved once at setup."""
+
+    name: str
+    repo_path: str
+    timeout: int
+    max_turns: int
+    allowed_tools: tuple[str, ...]
+    max_history: int
+    emoji_cycle: Iterator[str]
+    claude: ClaudeCLIWrapper
+    app: App | None = None
+    messaging: SlackMessaging | None = None
+
+
+class _ReplyLane:
+    """Runs one request's Slack calls in submission order on a shared executor.
+
+    Claude output arrives on the dispatcher thread, which must not block, so
+    streamed updates and the final reply are handed off here instead.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor) -> None:
+        """Initialize an empty lane.
+
+        Args:
+            executor: Executor the lane's jobs run on
+        """
+        self._executor = executor
+        self._jobs: deque[tuple[Callable, tuple]] = deque()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def submit(self, func: Callable, *args) -> None:
+        """Queue func(*args) to run after every job submitted before it.
+
+        Args:
+            func: Callable to run
+            *args: Positional arguments for func
+        """
+        with self._lock:
+            self._jobs.append((func, args))
+            if self._running:
+                return
+            self._running = True
+        self._executor.submit(self._drain)
+
+    def _drain(self) -> None:
+        """Run queued jobs until the lane is empty."""
+        while True:
+            with self._lock:
+                if not self._jobs:
+                    self._running = False
+                    return
+                func, args = self._jobs.popleft()
+            try:
+                func(*args)
+            except Exception:
+                logger.exception("Reply job failed")
+
 
 class MultiRepoBot:
     """Orchestrates multiple Slack bots for repository assistance."""
@@ -37,75 +153,204 @@ class MultiRepoBot:
             config_path: Path to bot_config.yaml
         """
         load_dotenv()
-        with Path(config_path).open() as f:
-            self.config = yaml.safe_load(f)
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self.config = _load_config(config_path)
+        self.work_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("MAX_QUEUE_DEPTH", "64")))
+        executor_config = self.config.get("executor", {})
+        # Work is I/O bound, so default to the same sizing ThreadPoolExecutor uses
+        worker_count = executor_config.get("max_workers") or min(32, (os.cpu_count() or 1) * 5)
+        self.workers = [
+            threading.Thread(target=self._worker_loop, name=f"sherpa-worker-{i}", daemon=True)
+            for i in range(worker_count)
+        ]
+        for worker in self.workers:
+            worker.start()
+        # Claude output for every bot is read by one dispatcher thread; Slack
+        # replies run on a small executor so neither holds a worker. Workers
+        # wait for a free Claude slot, so bursts back up into the bounded queue
+        self.dispatcher = ClaudeDispatcher(executor_config.get("max_in_flight") or MAX_IN_FLIGHT)
+        self.reply_executor = ThreadPoolExecutor(max_workers=worker_count, thread_name_prefix="sherpa-reply")
         self.app_manager = SlackAppManager(self.config)
-        self.thread_sessions = SessionManager()
+        self.thread_sessions = SessionManager(db_path=os.getenv("SESSIONS_DB", "sessions.db"))
+        self.runtimes: dict[str, BotRuntime] = {}
+        # (channel, thread_ts) currently being answered, and recently seen events
+        self._in_flight: set[tuple[str, str]] = set()
+        self._seen_events: OrderedDict[tuple[str, str], None] = OrderedDict()
+        self._in_flight_lock = threading.Lock()
         self._setup_bots()
 
+    def _worker_loop(self) -> None:
+        """Run queued jobs until the process exits."""
+        while True:
+            func, args = self.work_queue.get()
+            try:
+                func(*args)
+            except Exception:
+                logger.exception("Worker job failed")
+            finally:
+                self.work_queue.task_done()
+
+    def _claim_thread(self, channel: str, thread_ts: str, ts: str) -> bool | None:
+        """Mark a thread as being answered, rejecting duplicates.
+
+        Args:
+            channel: Slack channel ID
+            thread_ts: Thread timestamp
+            ts: Timestamp of the triggering message
+
+        Returns:
+            True if claimed, False if the thread is already being answered,
+            None if this exact event was already seen (a Slack re-delivery)
+        """
+        with self._in_flight_lock:
+            if (channel, ts) in self._seen_events:
+                return None
+            self._seen_events[(channel, ts)] = None
+            if len(self._seen_events) > SEEN_EVENTS_MAX:
+                self._seen_events.popitem(last=False)
+
+            if (channel, thread_ts) in self._in_flight:
+                return False
+            self._in_flight.add((channel, thread_ts))
+            return True
+
+    def _release_thread(self, channel: str, thread_ts: str) -> None:
+        """Allow new requests for a thread once its answer is done."""
+        with self._in_flight_lock:
+            self._in_flight.discard((channel, thread_ts))
+
+    def health_status(self) -> dict:
+        """Report work queue depth for the health endpoint."""
+        return {
+            "status": "ok",
+            "queue_depth": self.work_queue.qsize(),
+            "queue_capacity": self.work_queue.maxsize,
+        }
+
     def _setup_bots(self) -> None:
         """Initialize each bot from config."""
+        idle_timeout = float(os.getenv("CLAUDE_IDLE_TIMEOUT", IDLE_TIMEOUT))
         for bot_name, bot_config in self.config["bots"].items():
-            handler = self._make_app_mention_handler(bot_name, bot_config)
-            self.app_manager.setup_bot(bot_name, bot_config, handler)
+            repo_path = bot_config["repo_path"]
+            timeout = bot_config["timeout"]
+            max_turns = bot_config.get("max_turns", 40)
+            allowed_tools = tuple(bot_config.get("allowed_tools", ()))
+            # An empty list would leave the cycle with nothing to yield
+            emojis = tuple(bot_config.get("processing_emojis") or ("hourglass_flowing_sand",))
+            runtime = BotRuntime(
+                name=bot_name,
+                repo_path=repo_path,
+                timeout=timeout,
+                max_turns=max_turns,
+                allowed_tools=allowed_tools,
+                max_history=bot_config.get("context", {}).get("max_history", 100),
+                emoji_cycle=itertools.cycle(random.sample(emojis, len(emojis))),
+                claude=ClaudeCLIWrapper(
+                    repo_path=repo_path,
+                    timeout=timeout,
+                    max_turns=max_turns,
+                    allowed_tools=allowed_tools,
+                    pool_size=bot_config.get("pool_size", 1),
+                    dispatcher=self.dispatcher,
+                    idle_timeout=idle_timeout,
+                    max_sessions=bot_config.get("max_sessions", MAX_SESSIONS),
+                ),
+            )
+            handler = self._make_app_mention_handler(bot_name, runtime)
+            app = self.app_manager.setup_bot(bot_name, bot_config, handler)
+            if app is None:
+                continue
+
+            runtime.app = app
+            runtime.messaging = SlackMessaging(app)
+            self.runtimes[bot_name] = runtime
 
-    def _make_app_mention_handler(self, bot_name: str, bot_config: dict):
-        """Create a handler closure with bot_name and bot_config in scope.
+            # Pre-start Claude processes so the first mention skips CLI startup
+            runtime.claude.warm()
+
+    def _make_app_mention_handler(self, bot_name: str, runtime: BotRuntime):
+        """Create a handler closure with bot_name and its runtime in scope.
 
         Args:
             bot_name: Bot name from config
-            bot_config: Bot-specific configuration
+            runtime: Bot runtime state
 
         Returns:
             Event handler function
         """
 
         def handler(event, say, client):
-            thread_ts = event.get("thread_ts") or event["ts"]
-            channel = event.get("channel")
-
-            logger.info(f"[{bot_name}] Request received - channel: {channel}, thread: {thread_ts}")
-
-            # Randomly select and add one reaction to indicate we're working on it
-            emojis = bot_config.get("processing_emojis", ["hourglass_flowing_sand"])
-            selected_emoji = random.choice(emojis)
-
-            messaging = SlackMessaging(self.app_manager.apps[bot_name]["app"])
-            messaging.add_reaction(channel, event["ts"], selected_emoji)
-
-            # Submit job to executor for async processing
-            self.executor.submit(self.process_request, bot_name, event, say, client, selected_emoji)
+            ts = event["ts"]
+            thread_ts = event.get("thread_ts") or ts
+            channel = event["channel"]
+
+            logger.info("[%s] Request received - channel: %s, thread: %s", bot_name, channel, thread_ts)
+
+            claimed = self._claim_thread(channel, thread_ts, ts)
+            if claimed is None:
+                logger.info("[%s] Ignoring re-delivered event %s", bot_name, ts)
+                return
+
+            if not claimed:
+                logger.info("[%s] Thread %s already in progress, skipping", bot_name, thread_ts)
+                busy_msg = "⏳ Still working on the previous question in this thread, please ask again when I'm done."
+                runtime.messaging.post_message(say, busy_msg, thread_ts)
+                return
+
+            # Rotate through the shuffled reactions to indicate we're working on it
+            selected_emoji = next(runtime.emoji_cycle)
+
+            # Queue job for async processing, shedding load when the queue is full
+            reaction = runtime.messaging.add_reaction_later(channel, ts, selected_emoji, REACTION_DELAY)
+            try:
+                self.work_queue.put_nowait(
+                    (self.process_request, (runtime, channel, ts, thread_ts, say, client, reaction))
+                )
+            except queue.Full:
+                reaction.clear()
+                self._release_thread(channel, thread_ts)
+                logger.warning("[%s] Work queue full (%s), rejecting request", bot_name, self.work_queue.maxsize)
+                busy_msg = f"⚠️ I'm handling too many requests right now, please try again in {BUSY_RETRY_SECONDS}s."
+                runtime.messaging.post_message(say, busy_msg, thread_ts)
+                runtime.messaging.add_reaction(channel, ts, "no_entry")
 
         return handler
 
-    def process_request(self, bot_name: str, event: dict, say: callable, client: any, emoji: str) -> None:
-        """Process a Slack mention and respond using Claude Code.
+    def process_request(
+        self,
+        runtime: BotRuntime,
+        channel: str,
+        ts: str,
+        thread_ts: str,
+        say: callable,
+        client: any,
+        reaction: DelayedReaction,
+    ) -> None:
+        """Prepare a Slack mention and hand it to Claude Code.
+
+        The worker waits only for a free Claude slot (see ClaudeDispatcher) and
+        returns once the prompt is submitted; the reply is posted by
+        _finish_request once Claude's result arrives.
 
         Args:
-            bot_name: Bot name
-            event: Slack event dict
+            runtime: Bot runtime state
+            channel: Slack channel ID
+            ts: Timestamp of the mention message
+            thread_ts: Thread timestamp
             say: Slack say function
             client: Slack client
-            emoji: Selected emoji for cleanup
+            reaction: Pending processing reaction to clear when done
         """
-        config = self.app_manager.apps[bot_name]["config"]
-        thread_ts = event.get("thread_ts") or event["ts"]
-        channel = event["channel"]
+        bot_name = runtime.name
         start_time = time.time()
 
-        logger.info(f"[{bot_name}] Processing request - thread: {thread_ts}")
+        logger.info("[%s] Processing request - thread: %s", bot_name, thread_ts)
 
-        messaging = SlackMessaging(self.app_manager.apps[bot_name]["app"])
+        messaging = runtime.messaging
+        lane = _ReplyLane(self.reply_executor)
+        reply = None
+        claude_start = start_time
 
         try:
-            # Fetch thread context from Slack
-            messages = messaging.fetch_thread_context(channel, thread_ts)
-
-            # Get context settings from config
-            context_config = config.get("context", {})
-            max_history = context_config.get("max_history", 100)
-
             # Get session metadata for this thread
             session_metadata = self.thread_sessions.get_session_metadata(thread_ts)
             session_id = None
@@ -115,74 +360,176 @@ class MultiRepoBot:
                 session_id = session_metadata["session_id"]
                 last_message_ts = session_metadata.get("last_message_ts")
                 logger.info(
-                    f"[{bot_name}] Resuming session {session_id[:8]}... (last response: {last_message_ts or 'unknown'})"
+                    "[%s] Resuming session %.8s... (last response: %s)",
+                    bot_name,
+                    session_id,
+                    last_message_ts or "unknown",
                 )
             else:
-                logger.info(f"[{bot_name}] Starting new session")
+                logger.info("[%s] Starting new session", bot_name)
+
+            # Fetch thread context from Slack; resumed sessions only need newer replies
+            messages = messaging.fetch_thread_context(channel, thread_ts, oldest=last_message_ts)
 
             # Format prompt from thread history with filtering
-            logger.info(f"[{bot_name}] Building prompt... message = {messages[-1]['text'][:50]}...")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[%s] Building prompt... message = %.50s...", bot_name, messages[-1]["text"])
             prompt = PromptBuilder.build(
-                messages, config["repo_path"], last_message_ts=last_message_ts, max_history=max_history
+                messages, runtime.repo_path, last_message_ts=last_message_ts, max_history=runtime.max_history
             )
 
-            # Invoke Claude CLI
+            # Invoke Claude CLI; streamed text and the result arrive on the dispatcher thread
             claude_start = time.time()
-            claude = ClaudeCLIWrapper(
-                repo_path=config["repo_path"],
-                timeout=config["timeout"],
-                max_turns=config.get("max_turns", 40),
-                allowed_tools=config.get("allowed_tools", []),
+            reply = messaging.start_streaming_reply(channel, thread_ts, STREAM_UPDATE_INTERVAL)
+            future = runtime.claude.submit(prompt, session_id, on_text=lambda text: lane.submit(reply.append, text))
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+
+        future.add_done_callback(
+            lambda done: lane.submit(
+                self._finish_request,
+                runtime,
+                channel,
+                ts,
+                thread_ts,
+                say,
+                reaction,
+                reply,
+                done,
+                start_time,
+                claude_start,
             )
-            output = claude.invoke(prompt, session_id)
+        )
+
+    def _finish_request(
+        self,
+        runtime: BotRuntime,
+        channel: str,
+        ts: str,
+        thread_ts: str,
+        say: callable,
+        reaction: DelayedReaction,
+        reply: StreamingReply | None,
+        future: Future,
+        start_time: float,
+        claude_start: float,
+    ) -> None:
+        """Post Claude's response (or the error) and release the thread.
+
+        Args:
+            runtime: Bot runtime state
+            channel: Slack channel ID
+            ts: Timestamp of the mention message
+            thread_ts: Thread timestamp
+            say: Slack say function
+            reaction: Pending processing reaction to clear
+            reply: Streaming reply to finish, None if the request failed before submitting
+            future: Completed Claude turn
+            start_time: When processing of the request started
+            claude_start: When the prompt was submitted to Claude
+        """
+        bot_name = runtime.name
+        messaging = runtime.messaging
+        succeeded = False
+
+        try:
+            output = future.result()
             claude_duration = time.time() - claude_start
 
             # Store session metadata for future turns in this thread
             # Use the current message timestamp as our "last response" marker
-            self.thread_sessions.update_session(thread_ts, output["session_id"], event["ts"])
-
-            # Calculate response length for logging
-            response_length = len(output["result"])
-            total_duration = time.time() - start_time
-
-            logger.info(
-                f"[{bot_name}] Response sent - "
-                f"Claude: {claude_duration:.2f}s, "
-                f"Total: {total_duration:.2f}s, "
-                f"Chars: {response_length}, "
-                f"Session: {output['session_id'][:8]}..."
-            )
+            self.thread_sessions.update_session(thread_ts, output["session_id"], ts)
 
-            # Post response to Slack thread
-            messaging.post_message(say, output["result"], thread_ts)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "[%s] Response sent - Claude: %.2fs, Total: %.2fs, Chars: %d, Session: %.8s...",
+                    bot_name,
+                    claude_duration,
+                    time.time() - start_time,
+                    len(output["result"]),
+                    output["session_id"],
+                )
 
-            # Add success reaction
-            messaging.add_reaction(channel, event["ts"], "white_check_mark")
+            # Replace streamed progress with the final response
+            reply.finish(say, output["result"])
+            succeeded = True
 
         except TimeoutError:
-            logger.error(f"[{bot_name}] Request timed out after {config['timeout']}s")
+            logger.error("[%s] Request timed out after %ss", bot_name, runtime.timeout)
             error_msg = "Request timed out - the task took too long to complete."
-            messaging.post_message(say, error_msg, thread_ts)
-            messaging.add_reaction(channel, event["ts"], "x")
+            self._post_error(messaging, say, reply, error_msg, thread_ts)
         except ClaudeCLIError as e:
-            logger.error(f"[{bot_name}] Claude CLI error: {e}", exc_info=True)
+            logger.error("[%s] Claude CLI error: %s", bot_name, e, exc_info=True)
             error_msg = f"Error parsing Claude response: {str(e)}"
-            messaging.post_message(say, error_msg, thread_ts)
-            messaging.add_reaction(channel, event["ts"], "x")
+            self._post_error(messaging, say, reply, error_msg, thread_ts)
         except Exception as e:
-            logger.error(f"[{bot_name}] Unexpected error: {e}", exc_info=True)
+            logger.error("[%s] Unexpected error: %s", bot_name, e, exc_info=True)
             error_msg = f"Error processing request: {str(e)}"
-            messaging.post_message(say, error_msg, thread_ts)
-            messaging.add_reaction(channel, event["ts"], "x")
+            self._post_error(messaging, say, reply, error_msg, thread_ts)
+        finally:
+            # The reply is out, so the thread is free; reactions follow in the background
+            self._release_thread(channel, thread_ts)
+            self.reply_executor.submit(self._settle_reactions, messaging, channel, ts, reaction, succeeded)
+
+    @staticmethod
+    def _post_error(
+        messaging: SlackMessaging, say: callable, reply: StreamingReply | None, text: str, thread_ts: str
+    ) -> None:
+        """Report a failed request, replacing any streamed progress with the error.
+
+        Args:
+            messaging: Messaging wrapper for the bot
+            say: Slack say function
+            reply: Streaming reply for the request, None if it failed before submitting
+            text: Error message
+            thread_ts: Thread timestamp
+        """
+        if reply is not None:
+            reply.finish(say, text)
+        else:
+            messaging.post_message(say, text, thread_ts)
+
+    @staticmethod
+    def _settle_reactions(
+        messaging: SlackMessaging, channel: str, ts: str, reaction: DelayedReaction, succeeded: bool
+    ) -> None:
+        """Replace the processing reaction with the outcome.
+
+        A checkmark is only added if the processing reaction was shown, so fast
+        answers skip both reaction calls; failures always get an "x".
+
+        Args:
+            messaging: Messaging wrapper for the bot
+            channel: Slack channel ID
+            ts: Timestamp of the mention message
+            reaction: Pending processing reaction to clear
+            succeeded: Whether the response was posted
+        """
+        shown = reaction.clear()
+        if not succeeded:
+            messaging.add_reaction(channel, ts, "x")
+        elif shown:
+            messaging.add_reaction(channel, ts, "white_check_mark")
 
     def start(self) -> None:
         """Start all bot handlers."""
-        threads = self.app_manager.start_handlers()
+        healthz_port = os.getenv("HEALTHZ_PORT")
+        if healthz_port:
+            start_health_server(int(healthz_port), self.health_status)
+
+        handlers = self.app_manager.start_handlers()
 
-        # Keep main thread alive
+        # Keep main thread alive; the handlers run on their clients' threads
         try:
-            for thread in threads:
-                thread.join()
+            threading.Event().wait()
         except KeyboardInterrupt:
             logger.info("Shutting down...")
-            logger.info(f"Active sessions: {len(self.thread_sessions._sessions)}")
+            for handler in handlers:
+                handler.close()
+            logger.info("Pruned %s expired sessions", self.thread_sessions.prune())
+            logger.info("Active sessions: %s", len(self.thread_sessions))
+            self.dispatcher.close()
+            for runtime in self.runtimes.values():
+                runtime.claude.close()
+            self.thread_sessions.close()
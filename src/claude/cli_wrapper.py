@@ -2,10 +2,33 @@
 
 import json
 import logging
+import os
+import queue
+import selectors
+import shutil
 import subprocess
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cache
 
 logger = logging.getLogger(__name__)
 
+# Bytes of stderr kept per process for error reporting
+STDERR_TAIL_BYTES = 4096
+# Bytes of an unparseable stdout line attached to the error log record
+STDOUT_LOG_BYTES = 4096
+# Default seconds a session-bound process may sit unused before it is closed
+IDLE_TIMEOUT = 600
+# Default number of session-bound processes kept per bot; each is a resident CLI
+MAX_SESSIONS = 8
+# Default number of Claude turns a dispatcher runs at once, across all bots sharing it
+MAX_IN_FLIGHT = 8
+
 
 class ClaudeCLIError(Exception):
     """Raised when Claude CLI invocation fails."""
@@ -13,10 +36,477 @@ class ClaudeCLIError(Exception):
     pass
 
 
+@cache
+def _resolve_executable(program: str) -> str:
+    """Resolve a program against PATH once instead of on every spawn."""
+    return shutil.which(program) or program
+
+
+class ClaudeProcess:
+    """A long-lived Claude CLI process speaking the stream-json protocol.
+
+    Each turn is written to stdin as one JSON line; the CLI answers with a
+    stream of JSON lines terminated by a ``{"type": "result", ...}`` frame.
+
+    The process is spawned with vfork() rather than fork(), so the bot's page
+    tables are never copied. CPython falls back to fork() when Popen gets a
+    preexec_fn, user, group or extra_groups argument; do not add them here.
+    """
+
+    def __init__(self, cmd: list[str], cwd: str) -> None:
+        """Spawn the Claude CLI process.
+
+        Args:
+            cmd: Command argument list
+            cwd: Working directory (the repository)
+        """
+        self.proc = subprocess.Popen(
+            cmd,
+            executable=_resolve_executable(cmd[0]),
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        # Prompts are written by the dispatcher as stdin drains, never blocking it
+        os.set_blocking(self.proc.stdin.fileno(), False)
+        self.session_id: str | None = None
+        self.last_used = time.monotonic()
+        self._buffer = bytearray()
+        self._pending_input = bytearray()
+        self._stderr_tail = b""
+
+    @property
+    def alive(self) -> bool:
+        """Whether the underlying process is still running."""
+        return self.proc.poll() is None
+
+    def queue_prompt(self, prompt: str) -> None:
+        """Queue one user turn to be written by write_pending().
+
+        Args:
+            prompt: User prompt
+        """
+        frame = {"type": "user", "message": {"role": "user", "content": prompt}}
+        self._pending_input += json.dumps(frame).encode() + b"\n"
+
+    def write_pending(self) -> bool:
+        """Write as much queued input as stdin accepts without blocking.
+
+        Returns:
+            True once all queued input has been written
+
+        Raises:
+            ClaudeCLIError: If the process can no longer be written to
+        """
+        try:
+            while self._pending_input:
+                written = os.write(self.proc.stdin.fileno(), self._pending_input)
+                del self._pending_input[:written]
+        except BlockingIOError:
+            return False
+        except OSError as e:
+            raise ClaudeCLIError(f"Failed to send prompt to Claude CLI: {e}") from e
+        return True
+
+    def read_stdout(self) -> list[dict]:
+        """Read available stdout and decode every frame it completes.
+
+        Returns:
+            Frames in the order they were emitted (possibly none)
+
+        Raises:
+            ClaudeCLIError: If the process exited or emitted invalid JSON
+        """
+        chunk = os.read(self.proc.stdout.fileno(), 65536)
+        if not chunk:
+            raise ClaudeCLIError(f"Claude CLI exited unexpectedly (code {self.proc.poll()})")
+        self._buffer += chunk
+        frames = []
+        while (line := self._next_line()) is not None:
+            frames.append(self._parse_line(line))
+        return frames
+
+    def read_stderr(self) -> bool:
+        """Read available stderr into the kept tail.
+
+        Returns:
+            False once stderr has reached EOF
+        """
+        chunk = os.read(self.proc.stderr.fileno(), 65536)
+        self._stderr_tail = (self._stderr_tail + chunk)[-STDERR_TAIL_BYTES:]
+        return bool(chunk)
+
+    def _next_line(self) -> bytes | None:
+        """Pop the next complete line from the read buffer."""
+        newline = self._buffer.find(b"\n")
+        if newline < 0:
+            return None
+        line = bytes(self._buffer[:newline])
+        del self._buffer[: newline + 1]
+        return line
+
+    def _parse_line(self, line: bytes) -> dict:
+        """Decode one stream-json line."""
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            stdout = line[:STDOUT_LOG_BYTES].decode(errors="replace")
+            stderr = self._stderr_tail.decode(errors="replace")
+            logger.error(
+                "Failed to parse Claude CLI response as JSON",
+                exc_info=True,
+                extra={
+                    "stdout": stdout,
+                    "stderr": stderr,
+                    "returncode": self.proc.poll(),
+                },
+            )
+            raise ClaudeCLIError(f"Failed to parse Claude response: {e}") from e
+
+    def close(self) -> None:
+        """Terminate the process and release its pipes."""
+        if self.alive:
+            self.proc.kill()
+        self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            pipe.close()
+
+
+class ClaudePool:
+    """Pre-warmed and per-session Claude CLI processes for one bot configuration.
+
+    New conversations borrow an idle, already-started process. Once a process
+    has answered a turn it is bound to that session and kept for follow-ups,
+    so resumed threads skip process startup as well. A reaper thread closes
+    session-bound processes that go unused for idle_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        build_command: Callable[[str | None], list[str]],
+        cwd: str,
+        size: int,
+        max_sessions: int = MAX_SESSIONS,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ) -> None:
+        """Initialize pool.
+
+        Args:
+            build_command: Returns the CLI command for an optional session ID
+            cwd: Working directory (the repository)
+            size: Number of idle processes to keep warm
+            max_sessions: Maximum number of session-bound processes kept alive
+            idle_timeout: Seconds a session-bound process may go unused before it is closed
+        """
+        self.build_command = build_command
+        self.cwd = cwd
+        self.size = size
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._idle: queue.Queue[ClaudeProcess] = queue.Queue()
+        self._sessions: OrderedDict[str, ClaudeProcess] = OrderedDict()
+        self._lock = threading.Lock()
+        # Held while topping up _idle, so concurrent warm() calls cannot overshoot size
+        self._warm_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._reaper: threading.Thread | None = None
+
+    def warm(self) -> None:
+        """Start idle processes until the pool holds `size` of them."""
+        with self._warm_lock:
+            while self._idle.qsize() < self.size:
+                try:
+                    self._idle.put(ClaudeProcess(self.build_command(None), self.cwd))
+                except OSError as e:
+                    logger.warning("Failed to pre-warm Claude CLI in %s: %s", self.cwd, e)
+                    return
+
+    def acquire(self, session_id: str | None) -> ClaudeProcess:
+        """Borrow a process for a turn.
+
+        Args:
+            session_id: Optional session ID to resume
+
+        Returns:
+            A running process, exclusively owned by the caller until released
+        """
+        if session_id:
+            with self._lock:
+                process = self._sessions.pop(session_id, None)
+            if process and process.alive:
+                return process
+            if process:
+                process.close()
+            return ClaudeProcess(self.build_command(session_id), self.cwd)
+
+        while True:
+            try:
+                process = self._idle.get_nowait()
+            except queue.Empty:
+                return ClaudeProcess(self.build_command(None), self.cwd)
+            if process.alive:
+                threading.Thread(target=self.warm, name="claude-warm", daemon=True).start()
+                return process
+            process.close()
+
+    def release(self, process: ClaudeProcess) -> None:
+        """Return a process after a turn, keeping it bound to its session.
+
+        Args:
+            process: Process previously returned by acquire()
+        """
+        if not process.alive or not process.session_id:
+            process.close()
+            return
+
+        process.last_used = time.monotonic()
+        evicted = []
+        with self._lock:
+            previous = self._sessions.pop(process.session_id, None)
+            if previous is not None:
+                evicted.append(previous)
+            self._sessions[process.session_id] = process
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False)[1])
+            if self._reaper is None and not self._stopped.is_set():
+                self._reaper = threading.Thread(target=self._reap_loop, name="claude-reaper", daemon=True)
+                self._reaper.start()
+
+        for stale in evicted:
+            stale.close()
+
+    def _reap_loop(self) -> None:
+        """Close session-bound processes idle longer than idle_timeout until close()."""
+        while not self._stopped.wait(min(self.idle_timeout, 60)):
+            cutoff = time.monotonic() - self.idle_timeout
+            expired = []
+            with self._lock:
+                # Sessions are kept in release order, so the idlest come first
+                while self._sessions:
+                    session_id, process = next(iter(self._sessions.items()))
+                    if process.last_used > cutoff:
+                        break
+                    del self._sessions[session_id]
+                    expired.append(process)
+            for process in expired:
+                logger.debug("Closing Claude CLI idle for session %s", process.session_id)
+                process.close()
+
+    def close(self) -> None:
+        """Terminate all idle and session-bound processes."""
+        self._stopped.set()
+        with self._lock:
+            processes = list(self._sessions.values())
+            self._sessions.clear()
+        while not self._idle.empty():
+            processes.append(self._idle.get_nowait())
+        for process in processes:
+            process.close()
+
+
+@dataclass(eq=False)
+class _Turn:
+    """A prompt in flight on one process."""
+
+    process: ClaudeProcess
+    future: Future
+    deadline: float
+    timeout: float
+    on_frame: Callable[[dict], None] | None
+    on_done: Callable[[], None] | None
+
+
+class ClaudeDispatcher:
+    """One thread multiplexing the output of every in-flight Claude process.
+
+    submit() queues the prompt and returns immediately with a Future, so the
+    caller's thread is free while Claude works. The dispatcher thread writes
+    prompts as each process's stdin drains, so a CLI that is slow to read
+    only delays (and eventually times out) its own turn. Frame callbacks,
+    on_done hooks and Future callbacks all run on the dispatcher thread and
+    must not block.
+
+    At most max_in_flight turns run at once: callers reserve() a slot before
+    starting a CLI process for a turn and release() it when the turn ends,
+    so a burst of requests waits for a slot instead of starting a CLI each.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT) -> None:
+        """Initialize dispatcher; its thread starts on the first submit().
+
+        Args:
+            max_in_flight: Maximum number of turns running at once
+        """
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._selector: selectors.BaseSelector | None = None
+        self._turns: set[_Turn] = set()
+        self._submitted: queue.SimpleQueue[_Turn] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._wakeup_r = self._wakeup_w = -1
+        self._closed = False
+
+    def submit(
+        self,
+        process: ClaudeProcess,
+        prompt: str,
+        timeout: float,
+        on_frame: Callable[[dict], None] | None = None,
+        on_done: Callable[[], None] | None = None,
+    ) -> Future:
+        """Send a prompt and hand the process to the dispatcher thread.
+
+        Args:
+            process: Process to run the turn on, owned by the dispatcher until done
+            prompt: User prompt
+            timeout: Seconds to wait for the result frame
+            on_frame: Optional callback for each frame preceding the result
+            on_done: Optional hook run after the turn ends, before the Future resolves
+
+        Returns:
+            Future resolving to the result frame, or failing with
+            TimeoutError or ClaudeCLIError
+        """
+        turn = _Turn(process, Future(), time.monotonic() + timeout, timeout, on_frame, on_done)
+        process.queue_prompt(prompt)
+        try:
+            with self._lock:
+                if self._closed:
+                    raise ClaudeCLIError("Claude dispatcher is closed")
+                if self._thread is None:
+                    self._start()
+                self._submitted.put(turn)
+                os.write(self._wakeup_w, b"\0")
+        except ClaudeCLIError as e:
+            self._finish(turn, error=e)
+        return turn.future
+
+    def reserve(self) -> None:
+        """Block until fewer than max_in_flight turns are running, and claim a slot."""
+        self._slots.acquire()
+
+    def release(self) -> None:
+        """Free a slot claimed with reserve()."""
+        self._slots.release()
+
+    def close(self) -> None:
+        """Stop the dispatcher thread, failing any turns still in flight."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            os.write(self._wakeup_w, b"\0")
+            thread.join()
+
+    def _start(self) -> None:
+        """Create the selector and wakeup pipe and start the dispatcher thread."""
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name="claude-dispatcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Wait on all in-flight processes until close() is called."""
+        while not self._closed:
+            wait = None
+            if self._turns:
+                wait = max(0, min(turn.deadline for turn in self._turns) - time.monotonic())
+
+            for key, _ in self._selector.select(wait):
+                turn = key.data
+                if turn is None:
+                    os.read(self._wakeup_r, 4096)
+                elif turn in self._turns:
+                    self._on_ready(turn, key.fileobj)
+
+            while not self._submitted.empty():
+                self._watch(self._submitted.get())
+
+            now = time.monotonic()
+            for turn in [turn for turn in self._turns if turn.deadline <= now]:
+                self._finish(turn, error=TimeoutError(f"Claude CLI did not respond within {turn.timeout}s"))
+
+        with self._lock:
+            while not self._submitted.empty():
+                self._finish(self._submitted.get(), error=ClaudeCLIError("Claude dispatcher is closed"))
+            for turn in list(self._turns):
+                self._finish(turn, error=ClaudeCLIError("Claude dispatcher is closed"))
+            self._selector.close()
+            os.close(self._wakeup_r)
+            os.close(self._wakeup_w)
+
+    def _watch(self, turn: _Turn) -> None:
+        """Start watching a submitted turn, writing its prompt as far as stdin allows."""
+        process = turn.process
+        self._turns.add(turn)
+        self._selector.register(process.proc.stdout, selectors.EVENT_READ, turn)
+        self._selector.register(process.proc.stderr, selectors.EVENT_READ, turn)
+        try:
+            if not process.write_pending():
+                self._selector.register(process.proc.stdin, selectors.EVENT_WRITE, turn)
+        except ClaudeCLIError as e:
+            self._finish(turn, error=e)
+
+    def _on_ready(self, turn: _Turn, pipe: object) -> None:
+        """Feed or consume one process's pipe, finishing its turn on a result or error."""
+        process = turn.process
+        try:
+            if pipe is process.proc.stdin:
+                if process.write_pending():
+                    self._selector.unregister(pipe)
+                return
+            if pipe is process.proc.stderr:
+                if not process.read_stderr():
+                    self._selector.unregister(pipe)
+                return
+            for frame in process.read_stdout():
+                if frame.get("type") == "result":
+                    process.session_id = frame.get("session_id")
+                    self._finish(turn, result=frame)
+                    return
+                if turn.on_frame:
+                    turn.on_frame(frame)
+        except Exception as e:
+            self._finish(turn, error=e)
+
+    def _finish(self, turn: _Turn, result: dict | None = None, error: Exception | None = None) -> None:
+        """Stop watching a turn, close its process on error, and resolve its Future."""
+        if turn in self._turns:
+            self._turns.discard(turn)
+            for pipe in (turn.process.proc.stdin, turn.process.proc.stdout, turn.process.proc.stderr):
+                with suppress(KeyError):
+                    self._selector.unregister(pipe)
+        if error is not None:
+            turn.process.close()
+        if turn.on_done:
+            try:
+                turn.on_done()
+            except Exception:
+                logger.exception("Claude turn cleanup failed")
+        if error is not None:
+            turn.future.set_exception(error)
+        else:
+            turn.future.set_result(result)
+
+
 class ClaudeCLIWrapper:
     """Wraps Claude Code CLI subprocess execution."""
 
-    def __init__(self, repo_path: str, timeout: int, max_turns: int, allowed_tools: list[str]) -> None:
+    def __init__(
+        self,
+        repo_path: str,
+        timeout: int,
+        max_turns: int,
+        allowed_tools: Sequence[str],
+        pool_size: int = 1,
+        dispatcher: ClaudeDispatcher | None = None,
+        idle_timeout: float = IDLE_TIMEOUT,
+        max_sessions: int = MAX_SESSIONS,
+    ) -> None:
         """Initialize CLI wrapper.
 
         Args:
@@ -24,65 +514,104 @@ class ClaudeCLIWrapper:
             timeout: Request timeout in seconds
             max_turns: Maximum Claude turns
             allowed_tools: List of allowed tool names
+            pool_size: Number of idle Claude processes to keep warm
+            dispatcher: Dispatcher shared with other wrappers (default: a private one)
+            idle_timeout: Seconds a session's process is kept without follow-ups
+            max_sessions: Maximum number of session processes kept for follow-ups
         """
         self.repo_path = repo_path
         self.timeout = timeout
         self.max_turns = max_turns
         self.allowed_tools = allowed_tools
+        # Arguments shared by every process this wrapper starts, frozen so callers can't mutate them
+        base_cmd = ["claude", "-p", "--input-format", "stream-json", "--output-format", "stream-json"]
+        base_cmd.extend(["--verbose", "--max-turns", str(max_turns)])
+        if allowed_tools:
+            base_cmd.extend(["--allowed-tools", ",".join(allowed_tools)])
+        self._base_cmd = tuple(base_cmd)
+        self.pool = ClaudePool(
+            self._build_command, repo_path, pool_size, max_sessions=max_sessions, idle_timeout=idle_timeout
+        )
+        self._owns_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or ClaudeDispatcher()
 
-    def _build_command(self, prompt: str, session_id: str | None) -> list[str]:
-        """Build Claude CLI command arguments.
+    def _build_command(self, session_id: str | None) -> list[str]:
+        """Build Claude CLI command arguments for a persistent process.
 
         Args:
-            prompt: User prompt
             session_id: Optional session ID to resume
 
         Returns:
             Command argument list
         """
-        cmd = ["claude", "-p", prompt, "--output-format", "json"]
-        cmd.extend(["--max-turns", str(self.max_turns)])
+        if session_id:
+            return [*self._base_cmd, "--resume", session_id]
+        return list(self._base_cmd)
 
-        if self.allowed_tools:
-            cmd.extend(["--allowed-tools", ",".join(self.allowed_tools)])
+    def warm(self) -> None:
+        """Pre-start idle Claude processes for this repository."""
+        self.pool.warm()
 
-        if session_id:
-            cmd.extend(["--resume", session_id])
+    def close(self) -> None:
+        """Terminate this wrapper's pooled Claude processes."""
+        if self._owns_dispatcher:
+            self.dispatcher.close()
+        self.pool.close()
 
-        return cmd
+    def submit(self, prompt: str, session_id: str | None, on_text: Callable[[str], None] | None = None) -> Future:
+        """Start a turn on a pooled Claude CLI process without waiting for it.
 
-    def invoke(self, prompt: str, session_id: str | None) -> dict:
-        """Invoke Claude CLI and parse response.
+        Blocks only while the dispatcher already runs max_in_flight turns; the
+        slot is released once this turn ends, before the Future resolves.
 
         Args:
             prompt: User prompt
             session_id: Optional session ID to resume
+            on_text: Optional callback for assistant text as it streams in,
+                run on the dispatcher thread
 
         Returns:
-            Dict with 'result' and 'session_id' keys
-
-        Raises:
-            subprocess.TimeoutExpired: If CLI times out
-            ClaudeCLIError: If JSON parsing fails
+            Future resolving to a dict with 'result' and 'session_id' keys, or
+            failing with TimeoutError or ClaudeCLIError
         """
-        cmd = self._build_command(prompt, session_id)
+        on_frame = None
+        if on_text:
 
-        result = subprocess.run(cmd, cwd=self.repo_path, capture_output=True, text=True, timeout=self.timeout)
+            def on_frame(frame: dict) -> None:
+                if frame.get("type") != "assistant":
+                    return
+                for block in frame.get("message", {}).get("content", []):
+                    if block.get("type") == "text" and block.get("text"):
+                        on_text(block["text"])
 
+        self.dispatcher.reserve()
         try:
-            output = json.loads(result.stdout)
-            return output
-        except json.JSONDecodeError as e:
-            logger.error(
-                "Failed to parse Claude CLI response as JSON",
-                exc_info=True,
-                extra={
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "returncode": result.returncode,
-                },
-            )
-            logger.error(f"STDOUT: {result.stdout}")
-            logger.error(f"STDERR: {result.stderr}")
-            logger.error(f"Return code: {result.returncode}")
-            raise ClaudeCLIError(f"Failed to parse Claude response: {e}") from e
+            process = self.pool.acquire(session_id)
+        except BaseException:
+            self.dispatcher.release()
+            raise
+
+        def on_done() -> None:
+            try:
+                self.pool.release(process)
+            finally:
+                self.dispatcher.release()
+
+        return self.dispatcher.submit(process, prompt, self.timeout, on_frame, on_done)
+
+    def invoke(self, prompt: str, session_id: str | None, on_text: Callable[[str], None] | None = None) -> dict:
+        """Send a prompt to a pooled Claude CLI process and wait for the response.
+
+        Args:
+            prompt: User prompt
+            session_id: Optional session ID to resume
+            on_text: Optional callback for assistant text as it streams in
+
+        Returns:
+            Dict with 'result' and 'session_id' keys
+
+        Raises:
+            TimeoutError: If the CLI does not answer within the timeout
+            ClaudeCLIError: If the CLI exits or JSON parsing fails
+        """
+        return self.submit(prompt, session_id, on_text).result()
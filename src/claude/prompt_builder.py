@@ -1,9 +1,14 @@
 """Prompt formatting from Slack thread context."""
 
 import logging
+from bisect import bisect_right
 
 logger = logging.getLogger(__name__)
 
+# Line prefixes for history messages
+USER_PREFIX = "User: "
+ASSISTANT_PREFIX = "Assistant: "
+
 
 class PromptBuilder:
     """Builds prompts for Claude from Slack thread history."""
@@ -29,20 +34,37 @@ class PromptBuilder:
         if not messages:
             return ""
 
+        if len(messages) == 1 and not last_message_ts:
+            # Unthreaded mention: nothing to filter, cap or format as history
+            return f"{messages[0]['text']}\n\nYou are working in the repository at: {repo_path}"
+
+        # Index of the first message to keep; sliced once after filtering and capping
+        start = 0
+
         # Filter messages to only include new ones since last response
         if last_message_ts:
             # Parse Slack timestamp (format: "1234567890.123456")
             try:
                 last_ts_float = float(last_message_ts)
-                messages = [m for m in messages if float(m.get("ts", "0")) > last_ts_float]
-                logger.debug(f"Filtered to {len(messages)} messages since ts={last_message_ts}")
             except (ValueError, TypeError):
-                logger.warning(f"Invalid last_message_ts: {last_message_ts}, using full context")
+                logger.warning("Invalid last_message_ts: %s, using full context", last_message_ts)
+            else:
+                width = len(last_message_ts)
+                if len(messages[0].get("ts", "")) == width == len(messages[-1].get("ts", "")):
+                    # Replies come oldest first and fixed-width ts strings sort like
+                    # the numbers they encode, so binary search finds the cut-off
+                    start = bisect_right(messages, last_message_ts, key=lambda m: m.get("ts", "0"))
+                else:
+                    messages = [m for m in messages if float(m.get("ts", "0")) > last_ts_float]
+                logger.debug("Filtered to %s messages since ts=%s", len(messages) - start, last_message_ts)
 
         # Apply max_history cap
-        if max_history and len(messages) > max_history:
-            messages = messages[-max_history:]
-            logger.debug(f"Capped to last {max_history} messages")
+        if max_history and len(messages) - start > max_history:
+            start = len(messages) - max_history
+            logger.debug("Capped to last %s messages", max_history)
+
+        if start:
+            messages = messages[start:]
 
         # Handle empty result after filtering
         if not messages:
@@ -54,14 +76,13 @@ class PromptBuilder:
             return f"{messages[0]['text']}\n\nYou are working in the repository at: {repo_path}"
 
         # Build context from thread history
-        context = "Previous conversation:\n"
-        for msg in messages[:-1]:
-            role = "Assistant" if msg.get("bot_id") else "User"
-            context += f"{role}: {msg['text']}\n"
+        parts = ["Previous conversation:"]
+        parts.extend((ASSISTANT_PREFIX if msg.get("bot_id") else USER_PREFIX) + msg["text"] for msg in messages[:-1])
 
         # Add current question
-        current_question = messages[-1]["text"]
-        context += f"\nCurrent question: {current_question}\n"
-        context += f"\nYou are working in the repository at: {repo_path}"
+        parts.append("")
+        parts.append(f"Current question: {messages[-1]['text']}")
+        parts.append("")
+        parts.append(f"You are working in the repository at: {repo_path}")
 
-        return context
+        return "\n".join(parts)
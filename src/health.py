@@ -0,0 +1,42 @@
+"""Minimal HTTP health endpoint for metrics scraping."""
+
+import json
+import logging
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+def start_health_server(port: int, status: Callable[[], dict]) -> ThreadingHTTPServer:
+    """Serve GET /healthz with a JSON status body in a background thread.
+
+    Args:
+        port: TCP port to listen on (0 picks a free port)
+        status: Returns the status dict to serialize for each request
+
+    Returns:
+        The running server
+    """
+
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/healthz":
+                self.send_error(404)
+                return
+
+            body = json.dumps(status()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer(("", port), HealthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Health endpoint listening on port %s", server.server_address[1])
+    return server
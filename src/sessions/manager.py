@@ -1,16 +1,77 @@
 """Session ID management for thread continuity."""
 
+import itertools
 import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Number of independently locked shards (must be a power of two)
+SHARD_COUNT = 16
+
+# Seconds the background writer waits to batch rows before flushing to SQLite
+FLUSH_INTERVAL = 0.05
+
+# Default seconds a session is kept after its last update
+SESSION_TTL = 7 * 24 * 3600
+
+# Expired sessions are swept from memory once every this many updates
+SWEEP_INTERVAL = 256
+
 
 class SessionManager:
-    """Manages thread_ts -> session metadata mappings for conversation continuity."""
+    """Manages thread_ts -> session metadata mappings for conversation continuity.
 
-    def __init__(self) -> None:
-        """Initialize empty session storage."""
-        self._sessions: dict[str, dict] = {}
+    Sessions are split across SHARD_COUNT LRU shards, each behind its own lock,
+    so concurrent workers rarely contend and memory stays bounded. Sessions not
+    updated for ttl seconds are treated as gone.
+
+    With a db_path, every update is also written to SQLite (WAL mode) by a
+    background thread, and lookups that miss in memory fall back to the
+    database, so sessions survive restarts without blocking the caller.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, db_path: str | None = None, ttl: float = SESSION_TTL) -> None:
+        """Initialize session storage.
+
+        Args:
+            max_sessions: Approximate number of threads to keep in memory before
+                evicting the least recently used
+            db_path: Optional SQLite file to persist sessions to
+            ttl: Seconds a session is kept after its last update
+        """
+        self.ttl = ttl
+        self._shard_capacity = max(1, max_sessions // SHARD_COUNT)
+        # thread_ts -> (updated_at, session_id, last_message_ts), least recently used first;
+        # flat tuples instead of a metadata dict per thread keep large maps small
+        self._shards: list[OrderedDict[str, tuple[float, str, str]]] = [OrderedDict() for _ in range(SHARD_COUNT)]
+        self._locks = [threading.Lock() for _ in range(SHARD_COUNT)]
+        self._writes = itertools.count(1)
+
+        self._conn: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._pending: queue.Queue[tuple[str, str, str, float] | None] = queue.Queue()
+        self._writer: threading.Thread | None = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(thread_ts TEXT PRIMARY KEY, session_id TEXT NOT NULL, last_message_ts TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            self._writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+            self._writer.start()
+
+    def __len__(self) -> int:
+        """Number of threads with stored sessions."""
+        return sum(len(shard) for shard in self._shards)
 
     def get_session_metadata(self, thread_ts: str) -> dict | None:
         """Retrieve full session metadata for a thread.
@@ -21,7 +82,23 @@ class SessionManager:
         Returns:
             Dict with 'session_id' and 'last_message_ts' if exists, None otherwise
         """
-        return self._sessions.get(thread_ts)
+        index = hash(thread_ts) & (SHARD_COUNT - 1)
+        shard = self._shards[index]
+        with self._locks[index]:
+            entry = shard.get(thread_ts)
+            if entry is not None:
+                if entry[0] > time.time() - self.ttl:
+                    shard.move_to_end(thread_ts)
+                    return {"session_id": entry[1], "last_message_ts": entry[2]}
+                # Expired; the database copy is no newer
+                del shard[thread_ts]
+                return None
+
+        entry = self._load(thread_ts)
+        if entry is None:
+            return None
+        self._remember(thread_ts, entry)
+        return {"session_id": entry[1], "last_message_ts": entry[2]}
 
     def get_session_id(self, thread_ts: str) -> str | None:
         """Retrieve only session_id for a thread (backwards compatible).
@@ -32,7 +109,7 @@ class SessionManager:
         Returns:
             Session ID if exists, None otherwise
         """
-        metadata = self._sessions.get(thread_ts)
+        metadata = self.get_session_metadata(thread_ts)
         return metadata["session_id"] if metadata else None
 
     def get_session(self, thread_ts: str) -> str | None:
@@ -54,10 +131,12 @@ class SessionManager:
             session_id: Claude session ID
             last_message_ts: Timestamp of last message we responded to
         """
-        self._sessions[thread_ts] = {
-            "session_id": session_id,
-            "last_message_ts": last_message_ts,
-        }
+        updated_at = time.time()
+        self._remember(thread_ts, (updated_at, session_id, last_message_ts))
+        if self._conn is not None:
+            self._pending.put((thread_ts, session_id, last_message_ts, updated_at))
+        if next(self._writes) % SWEEP_INTERVAL == 0:
+            self._sweep()
 
     def set_session(self, thread_ts: str, session_id: str) -> None:
         """Store session_id for a thread (deprecated: use update_session).
@@ -68,3 +147,87 @@ class SessionManager:
         """
         # For backwards compatibility, create metadata with empty timestamp
         self.update_session(thread_ts, session_id, "")
+
+    def prune(self) -> int:
+        """Drop sessions that have outlived the TTL.
+
+        Returns:
+            Number of expired sessions removed from memory
+        """
+        cutoff = time.time() - self.ttl
+        removed = self._sweep(cutoff)
+        if self._conn is not None:
+            with self._db_lock, self._conn:
+                self._conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (cutoff,))
+        return removed
+
+    def close(self) -> None:
+        """Flush pending writes and close the database, if any."""
+        if self._conn is None:
+            return
+        self._pending.put(None)
+        self._writer.join()
+        with self._db_lock:
+            self._conn.close()
+        self._conn = None
+
+    def _sweep(self, cutoff: float | None = None) -> int:
+        """Remove sessions last updated at or before cutoff from every shard."""
+        if cutoff is None:
+            cutoff = time.time() - self.ttl
+        removed = 0
+        for shard, lock in zip(self._shards, self._locks, strict=True):
+            with lock:
+                expired = [thread_ts for thread_ts, entry in shard.items() if entry[0] <= cutoff]
+                for thread_ts in expired:
+                    del shard[thread_ts]
+            removed += len(expired)
+        if removed:
+            logger.debug("Swept %d expired sessions", removed)
+        return removed
+
+    def _remember(self, thread_ts: str, entry: tuple[float, str, str]) -> None:
+        """Insert an (updated_at, session_id, last_message_ts) entry into its shard, evicting the oldest."""
+        index = hash(thread_ts) & (SHARD_COUNT - 1)
+        shard = self._shards[index]
+        with self._locks[index]:
+            shard[thread_ts] = entry
+            shard.move_to_end(thread_ts)
+            while len(shard) > self._shard_capacity:
+                evicted, _ = shard.popitem(last=False)
+                logger.debug("Evicted session for thread %s", evicted)
+
+    def _load(self, thread_ts: str) -> tuple[float, str, str] | None:
+        """Look up a thread's unexpired session in the database."""
+        if self._conn is None:
+            return None
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT session_id, last_message_ts, updated_at FROM sessions WHERE thread_ts = ? AND updated_at > ?",
+                (thread_ts, time.time() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[2], row[0], row[1]
+
+    def _write_loop(self) -> None:
+        """Drain queued updates into SQLite in batches until close() is called."""
+        running = True
+        while running:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            try:
+                while (remaining := deadline - time.monotonic()) > 0:
+                    batch.append(self._pending.get(timeout=remaining))
+            except queue.Empty:
+                pass
+            if None in batch:
+                running = False
+                batch = [row for row in batch if row is not None]
+            if not batch:
+                continue
+            try:
+                with self._db_lock, self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)", batch)
+            except sqlite3.Error:
+                logger.exception("Failed to persist %s session(s)", len(batch))
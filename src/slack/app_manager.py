@@ -2,10 +2,11 @@
 
 import logging
 import os
-import threading
+import ssl
 
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_sdk import WebClient
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,9 @@ class SlackAppManager:
         """
         self.config = config
         self.apps: dict[str, dict] = {}
+        # One TLS context for every bot; urllib otherwise builds one (and
+        # reloads the CA bundle) for each HTTPS connection
+        self.ssl_context = ssl.create_default_context()
 
     def setup_bot(self, bot_name: str, bot_config: dict, handler: callable) -> App | None:
         """Initialize a bot with its event handler.
@@ -34,45 +38,43 @@ class SlackAppManager:
             App instance if successful, None if tokens missing
         """
         # Load tokens from environment
-        bot_token_key = f"{bot_name.upper()}_BOT_TOKEN"
-        app_token_key = f"{bot_name.upper()}_APP_TOKEN"
+        env_name = bot_name.upper()
+        bot_token_key = f"{env_name}_BOT_TOKEN"
+        app_token_key = f"{env_name}_APP_TOKEN"
 
         bot_token = os.getenv(bot_token_key)
         app_token = os.getenv(app_token_key)
 
         if not bot_token or not app_token:
-            logger.warning(f"Missing tokens for {bot_name}, skipping...")
+            logger.warning("Missing tokens for %s, skipping...", bot_name)
             return None
 
         # Create Slack App instance
-        app = App(token=bot_token)
+        app = App(client=WebClient(token=bot_token, ssl=self.ssl_context))
 
         # Register event handler
         app.event("app_mention")(handler)
 
-        self.apps[bot_name] = {"app": app, "config": bot_config}
+        self.apps[bot_name] = {"app": app, "config": bot_config, "app_token": app_token}
 
-        logger.info(f"Configured bot: {bot_name} (repo: {bot_config['repo_path']})")
+        logger.info("Configured bot: %s (repo: %s)", bot_name, bot_config["repo_path"])
         return app
 
-    def start_handlers(self) -> list[threading.Thread]:
-        """Start Socket Mode handlers for all configured bots.
+    def start_handlers(self) -> list[SocketModeHandler]:
+        """Connect Socket Mode handlers for all configured bots.
+
+        connect() returns once the WebSocket is up and leaves the socket to the
+        client's own threads, so no extra thread per bot blocks in start().
 
         Returns:
-            List of handler threads
+            List of connected handlers
         """
-        threads = []
+        handlers = []
         for bot_name, bot_data in self.apps.items():
-            app_token_key = f"{bot_name.upper()}_APP_TOKEN"
-            app_token = os.getenv(app_token_key)
-
-            handler = SocketModeHandler(bot_data["app"], app_token)
-
-            # Start handler in a separate thread
-            thread = threading.Thread(target=handler.start, daemon=True)
-            thread.start()
-            threads.append(thread)
-            logger.info(f"Started handler for: {bot_name}")
+            handler = SocketModeHandler(bot_data["app"], bot_data["app_token"])
+            handler.connect()
+            handlers.append(handler)
+            logger.info("Started handler for: %s", bot_name)
 
         logger.info("All bots started, listening for mentions...")
-        return threads
+        return handlers
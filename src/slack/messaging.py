@@ -1,11 +1,16 @@
 """Slack messaging and reaction utilities."""
 
 import logging
+import threading
+import time
 
 from slack_bolt import App
 
 logger = logging.getLogger(__name__)
 
+# Largest page conversations.replies allows, to keep round trips for long threads low
+REPLIES_PAGE_SIZE = 1000
+
 
 class SlackMessaging:
     """Handles Slack API interactions for messages and reactions."""
@@ -32,10 +37,10 @@ class SlackMessaging:
         """
         try:
             self.client.reactions_add(channel=channel, timestamp=timestamp, name=emoji)
-            logger.info(f"Added {emoji} reaction to {timestamp}")
+            logger.info("Added %s reaction to %s", emoji, timestamp)
             return True
         except Exception as e:
-            logger.warning(f"Failed to add {emoji} reaction: {e}")
+            logger.warning("Failed to add %s reaction: %s", emoji, e)
             return False
 
     def remove_reaction(self, channel: str, timestamp: str, emoji: str) -> bool:
@@ -51,12 +56,26 @@ class SlackMessaging:
         """
         try:
             self.client.reactions_remove(channel=channel, timestamp=timestamp, name=emoji)
-            logger.info(f"Removed {emoji} reaction from {timestamp}")
+            logger.info("Removed %s reaction from %s", emoji, timestamp)
             return True
         except Exception as e:
-            logger.warning(f"Failed to remove {emoji} reaction: {e}")
+            logger.warning("Failed to remove %s reaction: %s", emoji, e)
             return False
 
+    def add_reaction_later(self, channel: str, timestamp: str, emoji: str, delay: float) -> "DelayedReaction":
+        """Add emoji reaction after a delay unless cleared first.
+
+        Args:
+            channel: Slack channel ID
+            timestamp: Message timestamp
+            emoji: Emoji name (without colons)
+            delay: Seconds to wait before adding the reaction
+
+        Returns:
+            Handle used to clear the reaction when work completes
+        """
+        return DelayedReaction(self, channel, timestamp, emoji, delay)
+
     def post_message(self, say: callable, text: str, thread_ts: str) -> None:
         """Post message to Slack thread with mrkdwn formatting.
 
@@ -65,27 +84,206 @@ class SlackMessaging:
             text: Message text
             thread_ts: Thread timestamp
         """
-        say(
-            text=text,
-            thread_ts=thread_ts,
-            blocks=[{"type": "section", "text": {"type": "mrkdwn", "text": text}}],
-        )
+        say(text=text, thread_ts=thread_ts, blocks=_mrkdwn_blocks(text))
+
+    def post_thread_message(self, channel: str, text: str, thread_ts: str) -> str | None:
+        """Post message to Slack thread via the Web API.
+
+        Args:
+            channel: Slack channel ID
+            text: Message text
+            thread_ts: Thread timestamp
+
+        Returns:
+            Timestamp of the posted message, None on error
+        """
+        try:
+            result = self.client.chat_postMessage(
+                channel=channel, thread_ts=thread_ts, text=text, blocks=_mrkdwn_blocks(text)
+            )
+            return result["ts"]
+        except Exception as e:
+            logger.warning("Failed to post message to thread %s: %s", thread_ts, e)
+            return None
+
+    def update_message(self, channel: str, timestamp: str, text: str) -> bool:
+        """Replace the text of a posted message.
+
+        Args:
+            channel: Slack channel ID
+            timestamp: Message timestamp
+            text: New message text
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            self.client.chat_update(channel=channel, ts=timestamp, text=text, blocks=_mrkdwn_blocks(text))
+            return True
+        except Exception as e:
+            logger.warning("Failed to update message %s: %s", timestamp, e)
+            return False
+
+    def delete_message(self, channel: str, timestamp: str) -> bool:
+        """Delete a message the bot posted.
+
+        Args:
+            channel: Slack channel ID
+            timestamp: Message timestamp
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            self.client.chat_delete(channel=channel, ts=timestamp)
+            return True
+        except Exception as e:
+            logger.warning("Failed to delete message %s: %s", timestamp, e)
+            return False
+
+    def start_streaming_reply(self, channel: str, thread_ts: str, min_interval: float) -> "StreamingReply":
+        """Begin a thread reply that is edited as more text arrives.
+
+        Args:
+            channel: Slack channel ID
+            thread_ts: Thread timestamp
+            min_interval: Minimum seconds between message updates
+
+        Returns:
+            Handle that receives streamed text and the final response
+        """
+        return StreamingReply(self, channel, thread_ts, min_interval)
 
-    def fetch_thread_context(self, channel: str, thread_ts: str) -> list[dict]:
-        """Fetch all messages in a thread.
+    def fetch_thread_context(self, channel: str, thread_ts: str, oldest: str | None = None) -> list[dict]:
+        """Fetch messages in a thread, following pagination cursors.
 
         Args:
             channel: Slack channel ID
             thread_ts: Thread timestamp
+            oldest: Only fetch replies after this timestamp (for session resume)
 
         Returns:
             List of message dicts, empty list on error
         """
+        kwargs = {"channel": channel, "ts": thread_ts, "limit": REPLIES_PAGE_SIZE}
+        if oldest:
+            kwargs["oldest"] = oldest
         try:
-            result = self.client.conversations_replies(channel=channel, ts=thread_ts)
+            result = self.client.conversations_replies(**kwargs)
             messages = result["messages"]
-            logger.debug(f"Fetched {len(messages)} messages from thread {thread_ts}")
-            return messages
+            # Each cursor comes from the previous page, so pages are fetched in turn
+            while cursor := (result.get("response_metadata") or {}).get("next_cursor"):
+                result = self.client.conversations_replies(**kwargs, cursor=cursor)
+                messages.extend(result["messages"])
+            logger.debug("Fetched %s messages from thread %s", len(messages), thread_ts)
         except Exception as e:
-            logger.error(f"Error fetching thread context: {e}")
+            logger.error("Error fetching thread context: %s", e)
             return []
+
+        return messages
+
+
+class DelayedReaction:
+    """A reaction that only appears if the work outlives a short delay.
+
+    Fast responses never touch the reactions API; slow ones get a visible
+    "working on it" reaction that is removed again by clear().
+    """
+
+    def __init__(self, messaging: SlackMessaging, channel: str, timestamp: str, emoji: str, delay: float) -> None:
+        """Schedule the reaction.
+
+        Args:
+            messaging: Messaging wrapper used to add and remove the reaction
+            channel: Slack channel ID
+            timestamp: Message timestamp
+            emoji: Emoji name (without colons)
+            delay: Seconds to wait before adding the reaction
+        """
+        self.messaging = messaging
+        self.channel = channel
+        self.timestamp = timestamp
+        self.emoji = emoji
+        self._shown = False
+        self._timer = threading.Timer(delay, self._show)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _show(self) -> None:
+        self._shown = self.messaging.add_reaction(self.channel, self.timestamp, self.emoji)
+
+    def clear(self) -> bool:
+        """Cancel the pending reaction, removing it if it was already added.
+
+        Returns:
+            True if the reaction had been shown, False otherwise
+        """
+        self._timer.cancel()
+        self._timer.join()
+        if self._shown:
+            self.messaging.remove_reaction(self.channel, self.timestamp, self.emoji)
+        return self._shown
+
+
+class StreamingReply:
+    """A thread reply posted on the first streamed text and edited as more arrives.
+
+    Updates are throttled to one per min_interval to stay inside Slack's
+    chat.update rate limits; finish() always writes the final text.
+    """
+
+    def __init__(self, messaging: SlackMessaging, channel: str, thread_ts: str, min_interval: float) -> None:
+        """Initialize streaming reply.
+
+        Args:
+            messaging: Messaging wrapper used to post and update the reply
+            channel: Slack channel ID
+            thread_ts: Thread timestamp
+            min_interval: Minimum seconds between message updates
+        """
+        self.messaging = messaging
+        self.channel = channel
+        self.thread_ts = thread_ts
+        self.min_interval = min_interval
+        self.ts: str | None = None
+        self._parts: list[str] = []
+        self._last_flush = float("-inf")
+
+    def append(self, text: str) -> None:
+        """Add streamed text, posting or updating the reply if not throttled.
+
+        Args:
+            text: Newly streamed text
+        """
+        self._parts.append(text)
+        now = time.monotonic()
+        if now - self._last_flush < self.min_interval:
+            return
+
+        self._last_flush = now
+        progress = "\n\n".join(self._parts)
+        if self.ts is None:
+            self.ts = self.messaging.post_thread_message(self.channel, progress, self.thread_ts)
+        else:
+            self.messaging.update_message(self.channel, self.ts, progress)
+
+    def finish(self, say: callable, text: str) -> None:
+        """Replace the streamed progress with the final response (or an error).
+
+        If the progress message can't be edited it is deleted, so partial
+        output is never left in the thread looking like an answer.
+
+        Args:
+            say: Slack Bolt say function, used if nothing was streamed
+            text: Final response text
+        """
+        if self.ts is not None:
+            if self.messaging.update_message(self.channel, self.ts, text):
+                return
+            self.messaging.delete_message(self.channel, self.ts)
+        self.messaging.post_message(say, text, self.thread_ts)
+
+
+def _mrkdwn_blocks(text: str) -> list[dict]:
+    """Wrap text in a single mrkdwn section block."""
+    return [{"type": "section", "text": {"type": "mrkdwn", "text": text}}]
@@ -1,10 +1,21 @@
 #!/usr/bin/env python3
 """Integration test script to verify bot initialization."""
 
+import importlib
+import json
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 # Configure logging to see all output
 logging.basicConfig(
     level=logging.INFO,
@@ -15,59 +26,67 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# (module, class) pairs every deployment must be able to import
+REQUIRED_IMPORTS = [
+    ("src.bot", "MultiRepoBot"),
+    ("src.slack.app_manager", "SlackAppManager"),
+    ("src.slack.messaging", "SlackMessaging"),
+    ("src.claude.cli_wrapper", "ClaudeCLIWrapper"),
+    ("src.claude.prompt_builder", "PromptBuilder"),
+    ("src.sessions.manager", "SessionManager"),
+]
+
+
 def test_imports():
     """Test that all modules can be imported."""
     logger.info("Testing imports...")
 
-    try:
-        from src.bot import MultiRepoBot
-
-        logger.info("✓ MultiRepoBot imported successfully")
-    except ImportError as e:
-        logger.error(f"✗ Failed to import MultiRepoBot: {e}")
-        return False
+    # Reading and compiling the modules overlaps across threads; the import
+    # system's per-module locks keep shared dependencies from loading twice
+    with ThreadPoolExecutor(max_workers=len(REQUIRED_IMPORTS)) as executor:
+        futures = [executor.submit(importlib.import_module, module) for module, _ in REQUIRED_IMPORTS]
 
-    try:
-        from src.slack.app_manager import SlackAppManager
+    all_imported = True
+    for (module, name), future in zip(REQUIRED_IMPORTS, futures, strict=True):
+        try:
+            getattr(future.result(), name)
+            logger.info(f"✓ {name} imported successfully")
+        except (ImportError, AttributeError) as e:
+            logger.error(f"✗ Failed to import {name}: {e}")
+            all_imported = False
 
-        logger.info("✓ SlackAppManager imported successfully")
-    except ImportError as e:
-        logger.error(f"✗ Failed to import SlackAppManager: {e}")
-        return False
+    return all_imported
 
-    try:
-        from src.slack.messaging import SlackMessaging
 
-        logger.info("✓ SlackMessaging imported successfully")
-    except ImportError as e:
-        logger.error(f"✗ Failed to import SlackMessaging: {e}")
-        return False
+def _load_config_cached(path: Path) -> dict:
+    """Load a YAML config, reusing a JSON sidecar written on the last parse.
 
-    try:
-        from src.claude.cli_wrapper import ClaudeCLIWrapper
+    Args:
+        path: Path to the YAML file
 
-        logger.info("✓ ClaudeCLIWrapper imported successfully")
-    except ImportError as e:
-        logger.error(f"✗ Failed to import ClaudeCLIWrapper: {e}")
-        return False
-
-    try:
-        from src.claude.prompt_builder import PromptBuilder
-
-        logger.info("✓ PromptBuilder imported successfully")
-    except ImportError as e:
-        logger.error(f"✗ Failed to import PromptBuilder: {e}")
-        return False
+    Returns:
+        Parsed configuration dict
+    """
+    cache = path.with_name(path.name + ".json")
+    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
+        try:
+            with cache.open() as f:
+                return json.load(f)
+        except ValueError:
+            logger.warning(f"Ignoring unreadable config cache {cache}")
 
+    with path.open() as f:
+        config = yaml.load(f, Loader=SafeLoader)
     try:
-        from src.sessions.manager import SessionManager
-
-        logger.info("✓ SessionManager imported successfully")
-    except ImportError as e:
-        logger.error(f"✗ Failed to import SessionManager: {e}")
-        return False
-
-    return True
+        payload = json.dumps(config)
+    except (TypeError, ValueError):
+        logger.warning(f"Not caching {path}: it holds values JSON can't encode")
+        return config
+    # Write beside the cache and swap it in, so a failed write never leaves a truncated cache
+    tmp = cache.with_name(cache.name + ".tmp")
+    tmp.write_text(payload)
+    tmp.replace(cache)
+    return config
 
 
 def test_config_loading():
@@ -75,7 +94,6 @@ def test_config_loading():
     logger.info("\nTesting configuration loading...")
 
     try:
-        import yaml
         from dotenv import load_dotenv
 
         # Load environment variables
@@ -83,8 +101,7 @@ def test_config_loading():
         logger.info("✓ Environment variables loaded")
 
         # Load config
-        with Path("bot_config.yaml").open() as f:
-            config = yaml.safe_load(f)
+        config = _load_config_cached(Path("bot_config.yaml"))
 
         logger.info("✓ Configuration loaded successfully")
         logger.info(f"  - Bots configured: {list(config['bots'].keys())}")
@@ -99,11 +116,9 @@ def test_config_loading():
 
         # Check for tokens
         for bot_name in config["bots"]:
-            bot_token_key = f"{bot_name.upper()}_BOT_TOKEN"
-            app_token_key = f"{bot_name.upper()}_APP_TOKEN"
-
-            bot_token = os.getenv(bot_token_key)
-            app_token = os.getenv(app_token_key)
+            env_name = bot_name.upper()
+            bot_token = os.getenv(f"{env_name}_BOT_TOKEN")
+            app_token = os.getenv(f"{env_name}_APP_TOKEN")
 
             if bot_token and app_token:
                 logger.info(f"  ✓ {bot_name}: Tokens found (configured)")
@@ -126,7 +141,7 @@ def test_bot_initialization():
 
         bot = MultiRepoBot("bot_config.yaml")
         logger.info("✓ MultiRepoBot instantiated successfully")
-        logger.info(f"  - Executor configured: {bot.executor is not None}")
+        logger.info(f"  - Work queue configured: {bot.work_queue is not None}")
         logger.info(f"  - App manager initialized: {bot.app_manager is not None}")
         logger.info(f"  - Session manager initialized: {bot.thread_sessions is not None}")
         logger.info(f"  - Apps configured: {list(bot.app_manager.apps.keys())}")
@@ -134,10 +149,7 @@ def test_bot_initialization():
         return True
 
     except Exception as e:
-        logger.error(f"✗ Failed to initialize MultiRepoBot: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception(f"✗ Failed to initialize MultiRepoBot: {e}")
         return False
 
 
@@ -181,10 +193,7 @@ def test_component_integration():
         return True
 
     except Exception as e:
-        logger.error(f"✗ Component integration test failed: {e}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception(f"✗ Component integration test failed: {e}")
         return False
 
 
@@ -208,17 +217,23 @@ def main():
         except Exception as e:
             logger.error(f"Test '{test_name}' crashed: {e}")
             results[test_name] = False
+        # Later tests depend on earlier ones, so stop at the first failure
+        if not results[test_name]:
+            break
 
     # Print summary
     logger.info("\n" + "=" * 60)
     logger.info("TEST SUMMARY")
     logger.info("=" * 60)
 
-    all_passed = True
-    for test_name, passed in results.items():
-        status = "✓ PASS" if passed else "✗ FAIL"
+    all_passed = len(results) == len(tests)
+    for test_name, _ in tests:
+        if test_name not in results:
+            logger.info(f"- SKIP: {test_name}")
+            continue
+        status = "✓ PASS" if results[test_name] else "✗ FAIL"
         logger.info(f"{status}: {test_name}")
-        if not passed:
+        if not results[test_name]:
             all_passed = False
 
     logger.info("=" * 60)
@@ -239,6 +254,8 @@ def main():
 
 
 if __name__ == "__main__":
-    import os
-
-    sys.exit(main())
+    exit_code = main()
+    # Skip interpreter teardown (module cleanup, atexit hooks) once output is flushed
+    logging.shutdown()
+    sys.stdout.flush()
+    os._exit(exit_code)
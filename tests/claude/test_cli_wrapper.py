@@ -1,21 +1,62 @@
-import json
-import subprocess
+import sys
+import threading
+import time
 from unittest.mock import Mock, patch
 
 import pytest
 
-from src.claude.cli_wrapper import ClaudeCLIError, ClaudeCLIWrapper
+from src.claude.cli_wrapper import ClaudeCLIError, ClaudeCLIWrapper, ClaudeDispatcher, ClaudePool
+
+# Minimal stand-in for `claude --input-format stream-json --output-format stream-json`
+FAKE_CLAUDE = r"""
+import json, os, sys, time
+mode = sys.argv[1]
+if mode == "sleepy":
+    time.sleep(2)
+for turn, line in enumerate(sys.stdin, start=1):
+    prompt = json.loads(line)["message"]["content"]
+    if mode == "garbage":
+        print("invalid json", flush=True)
+        continue
+    if mode == "slow":
+        time.sleep(10)
+    print(json.dumps({"type": "system", "subtype": "init"}), flush=True)
+    text = {"type": "text", "text": "Looking into it"}
+    print(json.dumps({"type": "assistant", "message": {"content": [text]}}), flush=True)
+    result = f"{prompt} (pid {os.getpid()}, turn {turn})"
+    print(json.dumps({"type": "result", "result": result, "session_id": "sess_123"}), flush=True)
+"""
+
+
+def fake_claude(mode="ok"):
+    return patch.object(ClaudeCLIWrapper, "_build_command", return_value=[sys.executable, "-c", FAKE_CLAUDE, mode])
+
+
+@pytest.fixture
+def make_wrapper(tmp_path):
+    wrappers = []
+
+    def factory(timeout=300, pool_size=1, dispatcher=None):
+        wrapper = ClaudeCLIWrapper(str(tmp_path), timeout, 40, [], pool_size=pool_size, dispatcher=dispatcher)
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield factory
+    for wrapper in wrappers:
+        wrapper.close()
 
 
 def test_cli_wrapper_command_construction():
     wrapper = ClaudeCLIWrapper(repo_path="/path/to/repo", timeout=300, max_turns=40, allowed_tools=["Read", "Grep"])
-    cmd = wrapper._build_command("test prompt", None)
+    cmd = wrapper._build_command(None)
     assert cmd == [
         "claude",
         "-p",
-        "test prompt",
+        "--input-format",
+        "stream-json",
         "--output-format",
-        "json",
+        "stream-json",
+        "--verbose",
         "--max-turns",
         "40",
         "--allowed-tools",
@@ -25,36 +66,162 @@ def test_cli_wrapper_command_construction():
 
 def test_cli_wrapper_with_session_resume():
     wrapper = ClaudeCLIWrapper(repo_path="/path/to/repo", timeout=300, max_turns=40, allowed_tools=[])
-    cmd = wrapper._build_command("test prompt", "session_123")
+    cmd = wrapper._build_command("session_123")
     assert "--resume" in cmd
     assert "session_123" in cmd
 
 
-def test_cli_wrapper_invoke_success():
-    mock_result = Mock()
-    mock_result.stdout = json.dumps({"result": "Response text", "session_id": "sess_123"})
+def test_cli_wrapper_invoke_success(make_wrapper):
+    with fake_claude():
+        wrapper = make_wrapper()
+        result = wrapper.invoke("test prompt", None)
+
+    assert result["result"].startswith("test prompt")
+    assert result["session_id"] == "sess_123"
+
+
+def test_cli_wrapper_streams_assistant_text(make_wrapper):
+    chunks = []
+    with fake_claude():
+        wrapper = make_wrapper()
+        wrapper.invoke("test prompt", None, on_text=chunks.append)
 
-    with patch("subprocess.run", return_value=mock_result) as mock_run:
-        wrapper = ClaudeCLIWrapper("/path/to/repo", 300, 40, [])
+    assert chunks == ["Looking into it"]
+
+
+def test_cli_wrapper_reuses_process_for_session(make_wrapper):
+    with fake_claude():
+        wrapper = make_wrapper()
+        first = wrapper.invoke("first", None)
+        second = wrapper.invoke("second", first["session_id"])
+
+    pid = first["result"].split("pid ")[1].split(",")[0]
+    assert second["result"] == f"second (pid {pid}, turn 2)"
+
+
+def test_cli_wrapper_warm_uses_idle_process(make_wrapper):
+    with fake_claude():
+        wrapper = make_wrapper(pool_size=1)
+        wrapper.warm()
+        warm_pid = wrapper.pool._idle.queue[0].proc.pid
         result = wrapper.invoke("test prompt", None)
 
-        assert result["result"] == "Response text"
-        assert result["session_id"] == "sess_123"
-        mock_run.assert_called_once()
+    assert f"pid {warm_pid}," in result["result"]
 
 
-def test_cli_wrapper_timeout_propagates():
-    with patch("subprocess.run", side_effect=subprocess.TimeoutExpired("claude", 300)):
-        wrapper = ClaudeCLIWrapper("/path/to/repo", 300, 40, [])
-        with pytest.raises(subprocess.TimeoutExpired):
+def test_cli_wrapper_timeout_propagates(make_wrapper):
+    with fake_claude("slow"):
+        wrapper = make_wrapper(timeout=0.5)
+        with pytest.raises(TimeoutError):
             wrapper.invoke("test prompt", None)
 
 
-def test_cli_wrapper_json_error():
-    mock_result = Mock()
-    mock_result.stdout = "invalid json"
+def test_cli_wrapper_json_error(make_wrapper):
+    with fake_claude("garbage"):
+        wrapper = make_wrapper()
+        with pytest.raises(ClaudeCLIError):
+            wrapper.invoke("test prompt", None)
+
+
+def test_cli_wrapper_spawn_keeps_vfork_fast_path(make_wrapper):
+    # The mocked pipes have no real fds, so keep set_blocking off the test's own stdout
+    with fake_claude(), patch("subprocess.Popen") as mock_popen, patch("src.claude.cli_wrapper.os.set_blocking"):
+        make_wrapper().warm()
+
+    kwargs = mock_popen.call_args.kwargs
+    for forbidden in ("preexec_fn", "user", "group", "extra_groups"):
+        assert forbidden not in kwargs
+
 
-    with patch("subprocess.run", return_value=mock_result):
-        wrapper = ClaudeCLIWrapper("/path/to/repo", 300, 40, [])
+def test_cli_wrapper_submit_runs_turns_concurrently(make_wrapper):
+    with fake_claude():
+        wrapper = make_wrapper()
+        futures = [wrapper.submit(f"prompt {i}", None) for i in range(3)]
+        results = [future.result(timeout=10)["result"] for future in futures]
+
+    assert [result.split(" (")[0] for result in results] == ["prompt 0", "prompt 1", "prompt 2"]
+    assert len({result.split("pid ")[1] for result in results}) == 3
+
+
+def test_cli_wrapper_reaps_idle_session_process(tmp_path):
+    with fake_claude():
+        wrapper = ClaudeCLIWrapper(str(tmp_path), 300, 40, [], idle_timeout=0.1)
+        wrapper.invoke("test prompt", None)
+        process = wrapper.pool._sessions["sess_123"]
+
+        deadline = time.monotonic() + 5
+        while process.alive and time.monotonic() < deadline:
+            time.sleep(0.05)
+        wrapper.close()
+
+    assert not process.alive
+    assert not wrapper.pool._sessions
+
+
+def test_cli_wrapper_json_error_truncates_logged_stdout(make_wrapper, caplog):
+    with fake_claude("garbage"), patch("src.claude.cli_wrapper.STDOUT_LOG_BYTES", 7):
+        wrapper = make_wrapper()
         with pytest.raises(ClaudeCLIError):
             wrapper.invoke("test prompt", None)
+
+    (record,) = [r for r in caplog.records if r.getMessage() == "Failed to parse Claude CLI response as JSON"]
+    assert record.stdout == "invalid"
+
+
+def test_cli_wrapper_slow_reader_does_not_block_other_submits(make_wrapper):
+    with fake_claude("sleepy"):
+        slow = make_wrapper()
+    with fake_claude():
+        fast = make_wrapper(dispatcher=slow.dispatcher)
+
+    slow_future = slow.submit("x" * 500_000, None)
+    result = fast.submit("hi", None).result(timeout=10)
+
+    assert result["result"].startswith("hi")
+    assert not slow_future.done()
+    assert slow_future.result(timeout=10)["result"].startswith("xxx")
+
+
+def test_cli_wrapper_passes_max_sessions_to_pool():
+    wrapper = ClaudeCLIWrapper(repo_path="/path/to/repo", timeout=300, max_turns=40, allowed_tools=[], max_sessions=3)
+    assert wrapper.pool.max_sessions == 3
+
+
+def test_cli_wrapper_submit_waits_for_free_slot(make_wrapper):
+    dispatcher = ClaudeDispatcher(max_in_flight=1)
+    with fake_claude("slow"):
+        wrapper = make_wrapper(timeout=0.5, dispatcher=dispatcher)
+    first = wrapper.submit("first", None)
+    second = []
+    waiter = threading.Thread(target=lambda: second.append(wrapper.submit("second", None)))
+    waiter.start()
+
+    waiter.join(0.2)
+    assert waiter.is_alive()
+    with pytest.raises(TimeoutError):
+        first.result(timeout=5)
+    waiter.join(5)
+    assert second
+    with pytest.raises(TimeoutError):
+        second[0].result(timeout=5)
+    dispatcher.close()
+
+
+def test_pool_concurrent_acquires_do_not_overfill_idle():
+    def slow_process(cmd, cwd):
+        time.sleep(0.05)
+        return Mock(alive=True)
+
+    with patch("src.claude.cli_wrapper.ClaudeProcess", side_effect=slow_process):
+        pool = ClaudePool(lambda session_id: ["claude"], "/path/to/repo", size=2)
+        pool.warm()
+        acquirers = [threading.Thread(target=pool.acquire, args=(None,)) for _ in range(4)]
+        for thread in acquirers:
+            thread.start()
+        for thread in acquirers:
+            thread.join()
+        for thread in threading.enumerate():
+            if thread.name == "claude-warm":
+                thread.join()
+
+    assert pool._idle.qsize() == 2
@@ -22,6 +22,24 @@ def test_thread_with_history():
     assert "/path/to/repo" in result
 
 
+def test_thread_with_history_exact_format():
+    messages = [
+        {"text": "How does auth work?"},
+        {"text": "Auth uses JWT tokens", "bot_id": "B12345"},
+        {"text": "What about refresh tokens?"},
+    ]
+    result = PromptBuilder.build(messages, "/path/to/repo")
+    assert result == (
+        "Previous conversation:\n"
+        "User: How does auth work?\n"
+        "Assistant: Auth uses JWT tokens\n"
+        "\n"
+        "Current question: What about refresh tokens?\n"
+        "\n"
+        "You are working in the repository at: /path/to/repo"
+    )
+
+
 def test_empty_messages():
     messages = []
     result = PromptBuilder.build(messages, "/path/to/repo")
@@ -43,6 +61,17 @@ def test_filtering_by_last_message_ts():
     assert "/path/to/repo" in result
 
 
+def test_filtering_with_mixed_width_timestamps():
+    """Timestamps of different widths are compared numerically."""
+    messages = [
+        {"text": "Old message", "ts": "9.5"},
+        {"text": "New message", "ts": "10.5"},
+    ]
+    result = PromptBuilder.build(messages, "/path/to/repo", last_message_ts="9.75")
+    assert "Old message" not in result
+    assert "New message" in result
+
+
 def test_max_history_cap():
     """Test that max_history caps the number of messages."""
     messages = [{"text": f"Message {i}", "ts": f"1000000000.00000{i}"} for i in range(10)]
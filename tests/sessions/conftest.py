@@ -0,0 +1,9 @@
+import pytest
+
+from src.sessions.manager import SessionManager
+
+
+@pytest.fixture
+def manager():
+    """A fresh in-memory SessionManager."""
+    return SessionManager()
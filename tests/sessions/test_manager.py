@@ -1,35 +1,32 @@
+from unittest.mock import patch
+
 from src.sessions.manager import SessionManager
 
 
-def test_session_manager_initially_empty():
-    manager = SessionManager()
+def test_session_manager_initially_empty(manager):
     assert manager.get_session("thread_123") is None
 
 
-def test_set_and_get_session():
-    manager = SessionManager()
+def test_set_and_get_session(manager):
     manager.set_session("thread_123", "session_abc")
     assert manager.get_session("thread_123") == "session_abc"
 
 
-def test_multiple_sessions():
-    manager = SessionManager()
+def test_multiple_sessions(manager):
     manager.set_session("thread_1", "session_a")
     manager.set_session("thread_2", "session_b")
     assert manager.get_session("thread_1") == "session_a"
     assert manager.get_session("thread_2") == "session_b"
 
 
-def test_overwrite_session():
-    manager = SessionManager()
+def test_overwrite_session(manager):
     manager.set_session("thread_1", "session_a")
     manager.set_session("thread_1", "session_b")
     assert manager.get_session("thread_1") == "session_b"
 
 
-def test_get_session_metadata():
+def test_get_session_metadata(manager):
     """Test retrieving full session metadata."""
-    manager = SessionManager()
     manager.update_session("thread_123", "session_abc", "1234567890.123456")
 
     metadata = manager.get_session_metadata("thread_123")
@@ -38,15 +35,21 @@ def test_get_session_metadata():
     assert metadata["last_message_ts"] == "1234567890.123456"
 
 
-def test_get_session_metadata_returns_none_for_nonexistent():
+def test_get_session_metadata_returns_copy(manager):
+    """Test that mutating returned metadata does not change the stored session."""
+    manager.update_session("thread_123", "session_abc", "1234567890.123456")
+
+    manager.get_session_metadata("thread_123")["session_id"] = "changed"
+    assert manager.get_session_id("thread_123") == "session_abc"
+
+
+def test_get_session_metadata_returns_none_for_nonexistent(manager):
     """Test that get_session_metadata returns None for non-existent sessions."""
-    manager = SessionManager()
     assert manager.get_session_metadata("nonexistent") is None
 
 
-def test_update_session():
+def test_update_session(manager):
     """Test updating session with full metadata."""
-    manager = SessionManager()
     manager.update_session("thread_123", "session_abc", "1234567890.123456")
 
     # Verify metadata was stored
@@ -58,9 +61,8 @@ def test_update_session():
     assert manager.get_session_id("thread_123") == "session_abc"
 
 
-def test_backwards_compatible_set_session():
+def test_backwards_compatible_set_session(manager):
     """Test that old set_session method still works (creates empty timestamp)."""
-    manager = SessionManager()
     manager.set_session("thread_123", "session_abc")
 
     metadata = manager.get_session_metadata("thread_123")
@@ -68,12 +70,64 @@ def test_backwards_compatible_set_session():
     assert metadata["last_message_ts"] == ""  # Empty string for backwards compat
 
 
-def test_update_session_overwrites():
+def test_update_session_overwrites(manager):
     """Test that update_session overwrites existing metadata."""
-    manager = SessionManager()
     manager.update_session("thread_123", "session_a", "1000000000.000001")
     manager.update_session("thread_123", "session_b", "2000000000.000002")
 
     metadata = manager.get_session_metadata("thread_123")
     assert metadata["session_id"] == "session_b"
     assert metadata["last_message_ts"] == "2000000000.000002"
+
+
+def test_len_counts_sessions(manager):
+    manager.update_session("thread_1", "session_a", "1.0")
+    manager.update_session("thread_2", "session_b", "2.0")
+    manager.update_session("thread_1", "session_c", "3.0")
+    assert len(manager) == 2
+
+
+def test_least_recently_used_sessions_evicted():
+    """Test that each shard drops its least recently used thread when full."""
+    manager = SessionManager(max_sessions=16)  # one session per shard
+    manager.update_session("thread_1", "session_a", "1.0")
+    # Find another thread that lands in the same shard
+    other = next(f"thread_{i}" for i in range(2, 1000) if hash(f"thread_{i}") & 15 == hash("thread_1") & 15)
+    manager.update_session(other, "session_b", "2.0")
+
+    assert manager.get_session_metadata("thread_1") is None
+    assert manager.get_session_id(other) == "session_b"
+
+
+def test_sessions_persist_across_restarts(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    manager = SessionManager(db_path=db_path)
+    manager.update_session("thread_1", "session_a", "1234.5678")
+    manager.close()
+
+    restarted = SessionManager(db_path=db_path)
+    assert restarted.get_session_metadata("thread_1") == {
+        "session_id": "session_a",
+        "last_message_ts": "1234.5678",
+    }
+    restarted.close()
+
+
+def test_expired_sessions_are_dropped():
+    manager = SessionManager(ttl=0)
+    manager.update_session("thread_1", "session_a", "1234.5678")
+    assert manager.get_session_id("thread_1") is None
+
+    manager.update_session("thread_2", "session_b", "1234.5678")
+    assert manager.prune() == 1
+    assert len(manager) == 0
+
+
+def test_expired_sessions_are_swept_on_write():
+    manager = SessionManager(ttl=3600)
+    manager.update_session("stale", "session_a", "1234.5678")
+    manager.ttl = 0
+    with patch("src.sessions.manager.SWEEP_INTERVAL", 2):
+        manager.update_session("fresh", "session_b", "1234.5679")
+
+    assert len(manager) == 0
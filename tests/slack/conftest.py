@@ -0,0 +1,20 @@
+from unittest.mock import MagicMock
+
+import pytest
+from slack_sdk import WebClient
+
+from src.slack.messaging import SlackMessaging
+
+
+@pytest.fixture
+def mock_app():
+    """A Bolt app stand-in whose client only allows real WebClient methods."""
+    app = MagicMock()
+    app.client = MagicMock(spec=WebClient)
+    return app
+
+
+@pytest.fixture
+def messaging(mock_app):
+    """A SlackMessaging wrapper around mock_app."""
+    return SlackMessaging(mock_app)
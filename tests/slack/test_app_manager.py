@@ -30,6 +30,25 @@ def test_setup_bot_creates_app():
     mock_app_instance.event.assert_called_once_with("app_mention")
 
 
+def test_setup_bot_shares_ssl_context():
+    config = {"backend": {"repo_path": "/path/a", "timeout": 300}, "frontend": {"repo_path": "/path/b", "timeout": 300}}
+    manager = SlackAppManager(config)
+
+    env = {
+        "BACKEND_BOT_TOKEN": "xoxb-a",
+        "BACKEND_APP_TOKEN": "xapp-a",
+        "FRONTEND_BOT_TOKEN": "xoxb-b",
+        "FRONTEND_APP_TOKEN": "xapp-b",
+    }
+    with patch.dict(os.environ, env), patch("src.slack.app_manager.App") as mock_app_class:
+        manager.setup_bot("backend", config["backend"], Mock())
+        manager.setup_bot("frontend", config["frontend"], Mock())
+
+    clients = [call.kwargs["client"] for call in mock_app_class.call_args_list]
+    assert [client.token for client in clients] == ["xoxb-a", "xoxb-b"]
+    assert all(client.ssl is manager.ssl_context for client in clients)
+
+
 def test_setup_bot_missing_tokens_skips():
     config = {"backend": {"repo_path": "/path", "timeout": 300}}
     manager = SlackAppManager(config)
@@ -46,16 +65,11 @@ def test_start_handlers():
     manager = SlackAppManager(config)
 
     mock_app = Mock()
-    manager.apps["backend"] = {"app": mock_app, "config": config["backend"]}
+    manager.apps["backend"] = {"app": mock_app, "config": config["backend"], "app_token": "xapp-test"}
 
-    with (
-        patch.dict(os.environ, {"BACKEND_APP_TOKEN": "xapp-test"}),
-        patch("src.slack.app_manager.SocketModeHandler") as mock_handler_class,
-        patch("threading.Thread") as mock_thread,
-    ):
-        mock_thread_instance = Mock()
-        mock_thread.return_value = mock_thread_instance
-        threads = manager.start_handlers()
+    with patch("src.slack.app_manager.SocketModeHandler") as mock_handler_class:
+        handlers = manager.start_handlers()
 
-        assert len(threads) == 1
-        mock_thread_instance.start.assert_called_once()
+        assert handlers == [mock_handler_class.return_value]
+        mock_handler_class.assert_called_once_with(mock_app, "xapp-test")
+        mock_handler_class.return_value.connect.assert_called_once()
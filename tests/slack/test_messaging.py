@@ -1,41 +1,26 @@
-from unittest.mock import MagicMock, Mock
+from unittest.mock import Mock
 
-from src.slack.messaging import SlackMessaging
-
-
-def test_add_reaction_success():
-    mock_app = Mock()
-    mock_app.client.reactions_add = MagicMock()
-    messaging = SlackMessaging(mock_app)
 
+def test_add_reaction_success(messaging, mock_app):
     result = messaging.add_reaction("C123", "123.456", "eyes")
     assert result is True
     mock_app.client.reactions_add.assert_called_once_with(channel="C123", timestamp="123.456", name="eyes")
 
 
-def test_add_reaction_failure():
-    mock_app = Mock()
-    mock_app.client.reactions_add = MagicMock(side_effect=Exception("Failed"))
-    messaging = SlackMessaging(mock_app)
+def test_add_reaction_failure(messaging, mock_app):
+    mock_app.client.reactions_add.side_effect = Exception("Failed")
 
     result = messaging.add_reaction("C123", "123.456", "eyes")
     assert result is False
 
 
-def test_remove_reaction_success():
-    mock_app = Mock()
-    mock_app.client.reactions_remove = MagicMock()
-    messaging = SlackMessaging(mock_app)
-
+def test_remove_reaction_success(messaging, mock_app):
     result = messaging.remove_reaction("C123", "123.456", "eyes")
     assert result is True
     mock_app.client.reactions_remove.assert_called_once_with(channel="C123", timestamp="123.456", name="eyes")
 
 
-def test_post_message_calls_say():
-    mock_app = Mock()
-    messaging = SlackMessaging(mock_app)
-
+def test_post_message_calls_say(messaging):
     mock_say = Mock()
     messaging.post_message(mock_say, "Test message", "123.456")
 
@@ -46,21 +31,113 @@ def test_post_message_calls_say():
     assert "blocks" in call_kwargs
 
 
-def test_fetch_thread_context():
-    mock_app = Mock()
-    mock_app.client.conversations_replies = MagicMock(return_value={"messages": [{"text": "msg1"}, {"text": "msg2"}]})
-    messaging = SlackMessaging(mock_app)
+def test_fetch_thread_context(messaging, mock_app):
+    mock_app.client.conversations_replies.return_value = {"messages": [{"text": "msg1"}, {"text": "msg2"}]}
 
     messages = messaging.fetch_thread_context("C123", "123.456")
 
     assert len(messages) == 2
-    mock_app.client.conversations_replies.assert_called_once_with(channel="C123", ts="123.456")
+    mock_app.client.conversations_replies.assert_called_once_with(channel="C123", ts="123.456", limit=1000)
 
 
-def test_fetch_thread_context_error():
-    mock_app = Mock()
-    mock_app.client.conversations_replies = MagicMock(side_effect=Exception("API Error"))
-    messaging = SlackMessaging(mock_app)
+def test_fetch_thread_context_follows_cursor(messaging, mock_app):
+    mock_app.client.conversations_replies.side_effect = [
+        {"messages": [{"text": "msg1"}], "response_metadata": {"next_cursor": "page2"}},
+        {"messages": [{"text": "msg2"}], "response_metadata": {"next_cursor": ""}},
+    ]
+
+    messages = messaging.fetch_thread_context("C123", "123.456")
+
+    assert [m["text"] for m in messages] == ["msg1", "msg2"]
+    mock_app.client.conversations_replies.assert_called_with(channel="C123", ts="123.456", limit=1000, cursor="page2")
+
+
+def test_fetch_thread_context_error(messaging, mock_app):
+    mock_app.client.conversations_replies.side_effect = Exception("API Error")
 
     messages = messaging.fetch_thread_context("C123", "123.456")
     assert messages == []
+
+
+def test_delayed_reaction_cleared_before_delay_skips_api(messaging, mock_app):
+    reaction = messaging.add_reaction_later("C123", "123.456", "eyes", delay=10)
+    assert reaction.clear() is False
+    mock_app.client.reactions_add.assert_not_called()
+    mock_app.client.reactions_remove.assert_not_called()
+
+
+def test_delayed_reaction_shown_then_removed(messaging, mock_app):
+    reaction = messaging.add_reaction_later("C123", "123.456", "eyes", delay=0)
+    reaction._timer.join()
+    assert reaction.clear() is True
+    mock_app.client.reactions_add.assert_called_once_with(channel="C123", timestamp="123.456", name="eyes")
+    mock_app.client.reactions_remove.assert_called_once_with(channel="C123", timestamp="123.456", name="eyes")
+
+
+def test_streaming_reply_posts_then_updates(messaging, mock_app):
+    mock_app.client.chat_postMessage.return_value = {"ts": "999.000"}
+
+    reply = messaging.start_streaming_reply("C123", "123.456", min_interval=0)
+    reply.append("Looking")
+    reply.append("Still looking")
+    reply.finish(Mock(), "Final answer")
+
+    mock_app.client.chat_postMessage.assert_called_once()
+    assert mock_app.client.chat_postMessage.call_args.kwargs["thread_ts"] == "123.456"
+    assert mock_app.client.chat_update.call_count == 2
+    assert mock_app.client.chat_update.call_args.kwargs["text"] == "Final answer"
+
+
+def test_streaming_reply_throttles_updates(messaging, mock_app):
+    mock_app.client.chat_postMessage.return_value = {"ts": "999.000"}
+
+    reply = messaging.start_streaming_reply("C123", "123.456", min_interval=60)
+    reply.append("Looking")
+    reply.append("Still looking")
+
+    mock_app.client.chat_postMessage.assert_called_once()
+    mock_app.client.chat_update.assert_not_called()
+
+
+def test_streaming_reply_without_text_posts_via_say(messaging, mock_app):
+    mock_say = Mock()
+
+    reply = messaging.start_streaming_reply("C123", "123.456", min_interval=1)
+    reply.finish(mock_say, "Final answer")
+
+    mock_say.assert_called_once()
+    assert mock_say.call_args.kwargs["text"] == "Final answer"
+    mock_app.client.chat_update.assert_not_called()
+
+
+def test_streaming_reply_deletes_progress_when_final_update_fails(messaging, mock_app):
+    mock_app.client.chat_postMessage.return_value = {"ts": "999.000"}
+    mock_app.client.chat_update.side_effect = Exception("Failed")
+    mock_say = Mock()
+
+    reply = messaging.start_streaming_reply("C123", "123.456", min_interval=0)
+    reply.append("Looking")
+    reply.finish(mock_say, "Final answer")
+
+    mock_app.client.chat_delete.assert_called_once_with(channel="C123", ts="999.000")
+    assert mock_say.call_args.kwargs["text"] == "Final answer"
+
+
+def test_fetch_thread_context_sees_replies_posted_since_last_fetch(messaging, mock_app):
+    mock_app.client.conversations_replies.side_effect = [
+        {"messages": [{"text": "msg1", "ts": "1.0"}]},
+        {"messages": [{"text": "msg1", "ts": "1.0"}, {"text": "FYI", "ts": "2.0"}]},
+    ]
+
+    messaging.fetch_thread_context("C123", "1.0")
+    messages = messaging.fetch_thread_context("C123", "1.0")
+
+    assert [m["text"] for m in messages] == ["msg1", "FYI"]
+
+
+def test_fetch_thread_context_passes_oldest(messaging, mock_app):
+    mock_app.client.conversations_replies.return_value = {"messages": [{"text": "new", "ts": "2.0"}]}
+
+    messaging.fetch_thread_context("C123", "1.0", oldest="1.5")
+
+    mock_app.client.conversations_replies.assert_called_once_with(channel="C123", ts="1.0", limit=1000, oldest="1.5")
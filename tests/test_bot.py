@@ -0,0 +1,160 @@
+import itertools
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+
+from src.bot import BotRuntime, MultiRepoBot, _ReplyLane
+from src.claude.cli_wrapper import ClaudeCLIError, ClaudeCLIWrapper
+from src.slack.messaging import DelayedReaction, SlackMessaging, StreamingReply
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    """A MultiRepoBot with no Slack apps configured."""
+    config_path = tmp_path / "bot_config.yaml"
+    config_path.write_text("bots: {}\nexecutor:\n  max_workers: 2\n")
+    monkeypatch.setenv("SESSIONS_DB", str(tmp_path / "sessions.db"))
+    bot = MultiRepoBot(str(config_path))
+    yield bot
+    bot.reply_executor.shutdown()
+    bot.dispatcher.close()
+    bot.thread_sessions.close()
+
+
+@pytest.fixture
+def runtime():
+    """A bot runtime whose Claude wrapper and Slack messaging are mocks."""
+    return BotRuntime(
+        name="backend",
+        repo_path="/path/to/repo",
+        timeout=1,
+        max_turns=40,
+        allowed_tools=(),
+        max_history=100,
+        emoji_cycle=itertools.cycle(["eyes"]),
+        claude=MagicMock(spec=ClaudeCLIWrapper),
+        messaging=MagicMock(spec=SlackMessaging),
+    )
+
+
+def failed(error):
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+def finish(bot, runtime, future, streamed_ts=None):
+    say = Mock()
+    reaction = MagicMock(spec=DelayedReaction)
+    reaction.clear.return_value = False
+    reply = StreamingReply(runtime.messaging, "C123", "1.0", min_interval=1)
+    reply.ts = streamed_ts
+    bot._claim_thread("C123", "1.0", "2.0")
+    bot._finish_request(runtime, "C123", "2.0", "1.0", say, reaction, reply, future, time.time(), time.time())
+    bot.reply_executor.shutdown()
+    return say, reaction, reply
+
+
+def test_finish_request_reports_timeout(bot, runtime):
+    say, _, _ = finish(bot, runtime, failed(TimeoutError("Claude CLI did not respond within 1s")))
+
+    runtime.messaging.post_message.assert_called_once_with(
+        say, "Request timed out - the task took too long to complete.", "1.0"
+    )
+    runtime.messaging.add_reaction.assert_called_once_with("C123", "2.0", "x")
+    assert ("C123", "1.0") not in bot._in_flight
+
+
+def test_finish_request_replaces_streamed_progress_with_error(bot, runtime):
+    runtime.messaging.update_message.return_value = True
+
+    finish(bot, runtime, failed(ClaudeCLIError("Claude CLI exited unexpectedly")), streamed_ts="5.0")
+
+    runtime.messaging.update_message.assert_called_once_with(
+        "C123", "5.0", "Error parsing Claude response: Claude CLI exited unexpectedly"
+    )
+    runtime.messaging.post_message.assert_not_called()
+
+
+def test_claim_thread_rejects_busy_thread_until_released(bot):
+    assert bot._claim_thread("C123", "1.0", "1.0") is True
+    assert bot._claim_thread("C123", "1.0", "2.0") is False
+
+    bot._release_thread("C123", "1.0")
+    assert bot._claim_thread("C123", "1.0", "3.0") is True
+
+
+def test_claim_thread_ignores_redelivered_event(bot):
+    assert bot._claim_thread("C123", "1.0", "1.0") is True
+    bot._release_thread("C123", "1.0")
+
+    assert bot._claim_thread("C123", "1.0", "1.0") is None
+
+
+def test_claim_thread_trims_seen_events(bot):
+    with patch("src.bot.SEEN_EVENTS_MAX", 2):
+        for ts in ("1.0", "2.0", "3.0"):
+            bot._claim_thread("C123", ts, ts)
+
+    assert list(bot._seen_events) == [("C123", "2.0"), ("C123", "3.0")]
+
+
+def test_full_work_queue_rejects_request(bot, runtime):
+    # The workers block on the original queue, so this one stays full
+    bot.work_queue = queue.Queue(maxsize=1)
+    bot.work_queue.put_nowait(None)
+    handler = bot._make_app_mention_handler("backend", runtime)
+    say = Mock()
+
+    handler({"ts": "1.0", "channel": "C123"}, say, Mock())
+
+    reaction = runtime.messaging.add_reaction_later.return_value
+    reaction.clear.assert_called_once()
+    assert "too many requests" in runtime.messaging.post_message.call_args.args[1]
+    runtime.messaging.add_reaction.assert_called_once_with("C123", "1.0", "no_entry")
+    assert ("C123", "1.0") not in bot._in_flight
+
+
+def test_reply_lane_runs_jobs_in_submission_order():
+    executor = ThreadPoolExecutor(max_workers=4)
+    lane = _ReplyLane(executor)
+    calls = []
+
+    def slow_append(text):
+        time.sleep(0.05)
+        calls.append(text)
+
+    # The first job is slow, so every later one queues up behind it
+    lane.submit(slow_append, "stream 0")
+    for i in range(1, 20):
+        lane.submit(calls.append, f"stream {i}")
+    lane.submit(calls.append, "final")
+    executor.shutdown()
+
+    assert calls == [f"stream {i}" for i in range(20)] + ["final"]
+
+
+@pytest.mark.parametrize(
+    ("shown", "succeeded", "expected"),
+    [
+        (True, True, "white_check_mark"),
+        (False, True, None),
+        (True, False, "x"),
+        (False, False, "x"),
+    ],
+)
+def test_settle_reactions(shown, succeeded, expected):
+    messaging = MagicMock(spec=SlackMessaging)
+    reaction = MagicMock(spec=DelayedReaction)
+    reaction.clear.return_value = shown
+
+    MultiRepoBot._settle_reactions(messaging, "C123", "1.0", reaction, succeeded)
+
+    reaction.clear.assert_called_once()
+    if expected is None:
+        messaging.add_reaction.assert_not_called()
+    else:
+        messaging.add_reaction.assert_called_once_with("C123", "1.0", expected)
@@ -0,0 +1,29 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.health import start_health_server
+
+
+def test_healthz_returns_status():
+    server = start_health_server(0, lambda: {"status": "ok", "queue_depth": 3})
+    port = server.server_address[1]
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz") as response:
+        body = json.loads(response.read())
+
+    server.shutdown()
+    assert body == {"status": "ok", "queue_depth": 3}
+
+
+def test_unknown_path_returns_404():
+    server = start_health_server(0, dict)
+    port = server.server_address[1]
+
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/other")
+
+    server.shutdown()
+    assert exc_info.value.code == 404